@@ -33,6 +33,9 @@ from .analysis_service import (
     AnalysisType,
     AnalysisResult,
     StructureDetection,
+    StructureBatch,
+    SegmentationMasks,
+    build_structure_arrays,
     get_analysis_service,
     init_analysis_service
 )
@@ -59,6 +62,9 @@ __all__ = [
     "AnalysisType",
     "AnalysisResult",
     "StructureDetection",
+    "StructureBatch",
+    "SegmentationMasks",
+    "build_structure_arrays",
     "get_analysis_service",
     "init_analysis_service",
     # Voice
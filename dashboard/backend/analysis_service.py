@@ -16,20 +16,34 @@ Features:
 """
 
 import asyncio
+import base64
+import hashlib
 import json
 import time
 import sys
+import threading
+import zlib
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Awaitable, Callable, Iterator, List, Mapping, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
+from collections import OrderedDict
+from functools import lru_cache
+from multiprocessing import shared_memory
+import cv2
 import numpy as np
 
 # Add parent src to path for importing NeuroVision modules
 DASHBOARD_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(DASHBOARD_ROOT))
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 try:
     from src.vision import (
         NeuroimagingSegmenter,
@@ -43,6 +57,158 @@ except ImportError:
     print("[AnalysisService] Warning: NeuroVision modules not available")
 
 
+# Segmentation structure name -> structure type
+STRUCTURE_CLASSIFICATIONS = {
+    "tumor": "pathology",
+    "blood": "vessel",
+    "tissue": "parenchyma",
+    "instrument": "instrument",
+    "csf": "csf_space",
+    "enhancement": "pathology",
+    "edema": "pathology",
+    "parenchyma": "parenchyma",
+    "necrotic": "pathology"
+}
+
+
+# Claude response field -> (key paths, "first" | "all"). "first" takes the
+# first non-None value; "all" concatenates every list found.
+EXTRACT_SCHEMA = {
+    "safety_score": ((("safety_score",), ("safety", "safety_score")), "first"),
+    "technique_score": ((("overall_score",), ("technique", "quality_score")), "first"),
+    "instruments": ((("instruments",), ("instruments_visible",), ("instruments_detected",)), "all"),
+    "alerts": ((("alerts",), ("critical_alerts",), ("warnings",), ("proximity_warnings",)), "all"),
+    "structures": ((("structures_identified",), ("structures",), ("regions",)), "all"),
+    "anatomy_structures": ((("anatomy", "structures"),), "all"),
+    "guidance": ((("guidance",), ("real_time_feedback",)), "first"),
+    "voice_alert": ((("voice_alert",), ("voice_feedback",)), "first"),
+}
+
+
+# (epoch second, ISO prefix) of the most recently formatted timestamp
+_iso_second_cache: Tuple[int, str] = (-1, "")
+
+
+def _format_timestamp_ns(timestamp_ns: int) -> str:
+    """Format an epoch-ns timestamp as local ISO 8601, reusing the per-second prefix."""
+    global _iso_second_cache
+    second, remainder_ns = divmod(timestamp_ns, 1_000_000_000)
+    cached_second, prefix = _iso_second_cache
+    if second != cached_second:
+        prefix = datetime.fromtimestamp(second).isoformat()
+        _iso_second_cache = (second, prefix)
+    return f"{prefix}.{remainder_ns // 1000:06d}"
+
+
+def _frame_key(frame: np.ndarray) -> Tuple[Tuple[int, ...], str, bytes]:
+    """
+    Exact content key for a frame: shape, dtype and a 128-bit BLAKE2b digest
+    of the pixels. Any pixel change is a different key.
+    """
+    digest = hashlib.blake2b(np.ascontiguousarray(frame), digest_size=16).digest()
+    return frame.shape, frame.dtype.str, digest
+
+
+def _hash_masks(masks: Dict[str, np.ndarray]) -> int:
+    """64-bit content hash of a mask dict (CRC-32 and Adler-32 chained over all masks)."""
+    crc, adler = 0, 1
+    for name, mask in masks.items():
+        crc = zlib.crc32(name.encode(), crc)
+        crc = zlib.crc32(np.ascontiguousarray(mask), crc)
+        adler = zlib.adler32(np.ascontiguousarray(mask), adler)
+    return (crc << 32) | adler
+
+
+def _json_default(value: Any) -> Any:
+    """Fallback serializer for NumPy values when orjson is not installed."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_mask(mask: np.ndarray) -> Dict[str, Any]:
+    """Encode a segmentation mask as a base64 PNG for transport."""
+    binary = np.where(mask > 0, 255, 0).astype(np.uint8)
+    ok, buffer = cv2.imencode('.png', binary)
+    if not ok:
+        raise ValueError("PNG encoding of segmentation mask failed")
+    return {
+        "format": "png_b64",
+        "shape": binary.shape,
+        "data": base64.b64encode(buffer).decode('ascii')
+    }
+
+
+class SegmentationMasks(Mapping):
+    """
+    Read-only mapping of structure name to segmentation mask.
+
+    Holds the segmenter's masks by reference and defers all encoding until a
+    consumer asks for it: indexing returns bit-packed masks (8x smaller),
+    encode()/encode_all() produce the PNG transport format, and to_shm()
+    hands masks to another process through shared memory.
+    """
+
+    def __init__(self, masks: Dict[str, np.ndarray]):
+        self._masks = masks
+        self._packed: Dict[str, np.ndarray] = {}
+        self._encoded: Dict[str, Dict[str, Any]] = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        packed = self._packed.get(name)
+        if packed is None:
+            packed = np.packbits(self._masks[name] > 0, axis=-1)
+            self._packed[name] = packed
+        return packed
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._masks)
+
+    def __len__(self) -> int:
+        return len(self._masks)
+
+    def raw(self, name: str) -> np.ndarray:
+        """Return the unpacked uint8 mask as produced by the segmenter."""
+        return self._masks[name]
+
+    def encode(self, name: str) -> Dict[str, Any]:
+        """Return the PNG/base64 transport encoding of one mask (memoized)."""
+        encoded = self._encoded.get(name)
+        if encoded is None:
+            encoded = _encode_mask(self._masks[name])
+            self._encoded[name] = encoded
+        return encoded
+
+    def encode_all(self) -> Dict[str, Dict[str, Any]]:
+        """Return the transport encoding of every mask."""
+        return {name: self.encode(name) for name in self._masks}
+
+    def to_shm(self, name: str) -> Tuple[shared_memory.SharedMemory, Dict[str, Dict[str, Any]]]:
+        """
+        Copy all masks into one shared-memory block.
+
+        Args:
+            name: Shared memory block name
+
+        Returns:
+            (SharedMemory, layout) where layout maps each structure to its
+            offset, shape and dtype. The caller owns the block and must
+            close() and unlink() it.
+        """
+        total = sum(mask.nbytes for mask in self._masks.values())
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(total, 1))
+        layout = {}
+        offset = 0
+        for structure, mask in self._masks.items():
+            view = np.ndarray(mask.shape, dtype=mask.dtype, buffer=shm.buf, offset=offset)
+            view[...] = mask
+            layout[structure] = {"offset": offset, "shape": mask.shape, "dtype": mask.dtype.str}
+            offset += mask.nbytes
+        return shm, layout
+
+
 class AnalysisType(Enum):
     """Types of analysis that can be performed."""
     SEGMENTATION_ONLY = "segmentation"      # Fast, offline
@@ -66,11 +232,62 @@ class StructureDetection:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
+def build_structure_arrays(structures: List[StructureDetection]) -> Dict[str, np.ndarray]:
+    """
+    Build struct-of-arrays columns for a list of structures in a single pass.
+
+    Returns:
+        Dict with centroids (N, 2) float32, areas (N,) int32, critical (N,) bool,
+        pathology (N,) bool and confidence (N,) float32
+    """
+    n = len(structures)
+    centroids = np.empty((n, 2), dtype=np.float32)
+    areas = np.empty(n, dtype=np.int32)
+    critical = np.empty(n, dtype=bool)
+    pathology = np.empty(n, dtype=bool)
+    confidence = np.empty(n, dtype=np.float32)
+    for i, s in enumerate(structures):
+        centroids[i] = s.centroid
+        areas[i] = s.area
+        critical[i] = s.is_critical
+        pathology[i] = s.structure_type == "pathology"
+        confidence[i] = s.confidence
+    return {
+        "centroids": centroids,
+        "areas": areas,
+        "critical": critical,
+        "pathology": pathology,
+        "confidence": confidence,
+    }
+
+
+@dataclass
+class StructureBatch:
+    """Struct-of-arrays view over a list of StructureDetection objects."""
+    areas: np.ndarray          # int32 pixel areas
+    critical_mask: np.ndarray  # bool, structure.is_critical
+    pathology_mask: np.ndarray  # bool, structure_type == "pathology"
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "StructureBatch":
+        """Wrap columns produced by build_structure_arrays without copying."""
+        return cls(
+            areas=arrays["areas"],
+            critical_mask=arrays["critical"],
+            pathology_mask=arrays["pathology"]
+        )
+
+    @classmethod
+    def from_structures(cls, structures: List[StructureDetection]) -> "StructureBatch":
+        """Build the column arrays in a single pass over the structures."""
+        return cls.from_arrays(build_structure_arrays(structures))
+
+
 @dataclass
 class AnalysisResult:
     """Complete analysis result for a frame."""
     frame_id: int
-    timestamp: datetime
+    timestamp_ns: int  # time.time_ns() at analysis start
     processing_time_ms: float
     analysis_type: AnalysisType
 
@@ -88,20 +305,28 @@ class AnalysisResult:
     voice_alert: Optional[str] = None
 
     # Segmentation data
-    segmentation_masks: Optional[Dict[str, Any]] = None
+    segmentation_masks: Optional[SegmentationMasks] = None
+
+    # Struct-of-arrays view of structures (see build_structure_arrays)
+    arrays: Optional[Dict[str, np.ndarray]] = None
 
     # Raw data
     raw_analysis: Optional[Dict[str, Any]] = None
 
+    @property
+    def timestamp(self) -> datetime:
+        """Analysis start time as a local datetime."""
+        return datetime.fromtimestamp(self.timestamp_ns / 1e9)
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to JSON-serializable dictionary."""
         return {
             "frame_id": self.frame_id,
-            "timestamp": self.timestamp.isoformat(),
-            "processing_time_ms": round(self.processing_time_ms, 2),
+            "timestamp": _format_timestamp_ns(self.timestamp_ns),
+            "processing_time_ms": self.processing_time_ms,
             "analysis_type": self.analysis_type.value,
-            "safety_score": round(self.safety_score, 1),
-            "technique_score": round(self.technique_score, 1) if self.technique_score else None,
+            "safety_score": self.safety_score,
+            "technique_score": self.technique_score,
             "structures": [
                 {
                     "name": s.name,
@@ -109,7 +334,7 @@ class AnalysisResult:
                     "centroid": s.centroid,
                     "bounding_box": s.bounding_box,
                     "area": s.area,
-                    "confidence": round(s.confidence, 2),
+                    "confidence": s.confidence,
                     "is_critical": s.is_critical,
                     "safety_margin_mm": s.safety_margin_mm,
                     "metadata": s.metadata
@@ -122,6 +347,12 @@ class AnalysisResult:
             "voice_alert": self.voice_alert
         }
 
+    def to_json(self) -> bytes:
+        """Serialize to_dict() as UTF-8 JSON bytes (orjson when installed)."""
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(self.to_dict(), option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(self.to_dict(), default=_json_default).encode("utf-8")
+
 
 class AnalysisService:
     """
@@ -131,6 +362,29 @@ class AnalysisService:
     analysis with caching and throttling support.
     """
 
+    # Identical-frame segmentation cache (only when cache_identical_frames is set)
+    HASH_CACHE_SIZE = 16
+    HASH_CACHE_MAX_AGE_SECONDS = 1.0  # Re-segment a static scene at least this often
+    HASH_CACHE_MAX_HITS = 30          # ...and after this many reuses of one entry
+
+    # Claude micro-batching
+    CLAUDE_MAX_BATCH = 4
+    CLAUDE_BATCH_WINDOW_SECONDS = 0.05  # Coalescing window once more than one frame is pending
+
+    # Analysis types that run local segmentation
+    SEGMENTATION_TYPES = frozenset({
+        AnalysisType.SEGMENTATION_ONLY,
+        AnalysisType.HYBRID,
+        AnalysisType.NAVIGATION,
+    })
+
+    # Analysis types that call Claude Vision
+    CLAUDE_TYPES = frozenset({
+        AnalysisType.CLAUDE_VISION,
+        AnalysisType.HYBRID,
+        AnalysisType.SAFETY_CHECK,
+    })
+
     # Analysis modes mapping
     MODE_MAP = {
         AnalysisType.SAFETY_CHECK: AnalysisMode.OR_SAFETY if NEUROVISION_AVAILABLE else None,
@@ -142,18 +396,25 @@ class AnalysisService:
         self,
         modality: str = "OR_CAMERA",
         claude_api_key: Optional[str] = None,
-        claude_analysis_interval: float = 0.5  # Seconds between Claude calls
+        claude_analysis_interval: float = 0.5,  # Seconds between Claude calls
+        cache_identical_frames: bool = False  # Reuse segmentation for byte-identical frames
     ):
         self.modality = modality
         self.claude_analysis_interval = claude_analysis_interval
+        self.cache_identical_frames = cache_identical_frames
 
         # Initialize segmenter (always available, no API needed)
+        self.segmenter = None
         if NEUROVISION_AVAILABLE:
-            self.segmenter = NeuroimagingSegmenter(modality=modality)
+            segmenter = NeuroimagingSegmenter(modality=modality)
+            if self._validate_segmenter(segmenter):
+                self.segmenter = segmenter
         else:
-            self.segmenter = None
             print("[AnalysisService] Warning: Segmenter not available")
 
+        # Bound once so the per-frame path doesn't re-resolve the attribute
+        self._segment_all = self.segmenter.segment_all if self.segmenter else None
+
         # Initialize Claude analyzer (optional, requires API key)
         self.claude_analyzer = None
         if NEUROVISION_AVAILABLE and claude_api_key:
@@ -165,15 +426,41 @@ class AnalysisService:
 
         # Caching
         self._last_claude_analysis: Optional[Dict] = None
+        self._last_claude_fields: Dict[str, Any] = {}
         self._last_claude_time: float = 0
         self._analysis_count = 0
 
+        # Segmentation results keyed by exact frame content (most recent last):
+        # key -> (stored at, hits, structures, masks). Only used with
+        # cache_identical_frames: synthetic feeds and paused or looping video
+        # files repeat frames exactly, but sensor noise means a live camera
+        # never does and every frame would pay for a full-frame hash.
+        self._hash_cache: "OrderedDict[Tuple, Tuple[float, int, List[StructureDetection], Optional[SegmentationMasks]]]" = OrderedDict()
+        self._hash_cache_hits = 0
+
+        # (mask hash, structures) from the last segmentation that ran
+        self._last_seg_output: Optional[Tuple[int, List[StructureDetection]]] = None
+
+        # Per-thread scratch buffers reused across frames (segmentation runs in worker threads)
+        self._scratch = threading.local()
+
+        # Claude request batching (queue + worker are bound to the running loop)
+        self._claude_queue: Optional[asyncio.Queue] = None
+        self._claude_worker: Optional[asyncio.Task] = None
+        self._claude_batches = 0
+
+        # Per-AnalysisType pipelines with stage decisions resolved up front
+        self._dispatch: Dict[AnalysisType, Callable[[np.ndarray, int, bool, bool], Awaitable[AnalysisResult]]] = {
+            t: self._make_analyzer(t) for t in AnalysisType
+        }
+
     async def analyze_frame(
         self,
         frame: np.ndarray,
         frame_id: int,
         analysis_type: AnalysisType = AnalysisType.HYBRID,
-        force_claude: bool = False
+        force_claude: bool = False,
+        return_masks: bool = True
     ) -> AnalysisResult:
         """
         Analyze a camera frame.
@@ -183,12 +470,59 @@ class AnalysisService:
             frame_id: Unique frame identifier
             analysis_type: Type of analysis to perform
             force_claude: Force Claude analysis regardless of throttling
+            return_masks: Attach the (lazily encoded) segmentation masks to the result
 
         Returns:
             AnalysisResult with all detections and scores
         """
+        return await self._dispatch[analysis_type](frame, frame_id, force_claude, return_masks)
+
+    def _make_analyzer(
+        self,
+        analysis_type: AnalysisType
+    ) -> Callable[[np.ndarray, int, bool, bool], Awaitable[AnalysisResult]]:
+        """
+        Build the analysis coroutine for one AnalysisType.
+
+        Which stages run depends only on the analysis type and on what was
+        available at init, so those decisions are made here once instead of
+        on every frame.
+        """
+        run_segmentation = self._segment_all is not None and analysis_type in self.SEGMENTATION_TYPES
+        cache_segmentation = run_segmentation and self.cache_identical_frames
+        run_claude = self.claude_analyzer is not None and analysis_type in self.CLAUDE_TYPES
+        reuse_claude = analysis_type != AnalysisType.SEGMENTATION_ONLY
+        mode = self.MODE_MAP.get(analysis_type, AnalysisMode.FULL) if run_claude else None
+
+        async def analyze(
+            frame: np.ndarray,
+            frame_id: int,
+            force_claude: bool,
+            return_masks: bool
+        ) -> AnalysisResult:
+            return await self._analyze(
+                frame, frame_id, analysis_type, run_segmentation, cache_segmentation,
+                run_claude, reuse_claude, mode, force_claude, return_masks
+            )
+
+        return analyze
+
+    async def _analyze(
+        self,
+        frame: np.ndarray,
+        frame_id: int,
+        analysis_type: AnalysisType,
+        run_segmentation: bool,
+        cache_segmentation: bool,
+        run_claude: bool,
+        reuse_claude: bool,
+        mode: Any,
+        force_claude: bool,
+        return_masks: bool
+    ) -> AnalysisResult:
+        """Shared analysis pipeline; stage flags come from _make_analyzer()."""
         start_time = time.time()
-        timestamp = datetime.now()
+        timestamp_ns = time.time_ns()
 
         structures: List[StructureDetection] = []
         instruments: List[Dict] = []
@@ -200,89 +534,95 @@ class AnalysisService:
         raw_analysis = None
         segmentation_masks = None
 
-        # Run local segmentation (fast, always available)
-        if self.segmenter and analysis_type in (
-            AnalysisType.SEGMENTATION_ONLY,
-            AnalysisType.HYBRID,
-            AnalysisType.NAVIGATION
+        # A bad frame degrades to an empty segmentation rather than breaking the analysis loop
+        if run_segmentation and (
+            not isinstance(frame, np.ndarray) or frame.ndim not in (2, 3) or frame.size == 0
         ):
-            try:
-                masks = self.segmenter.segment_all(frame)
-                contours_data = self.segmenter.get_contours_and_centroids(masks)
-
-                # Convert to StructureDetection objects
-                for structure_name, instances in contours_data.items():
-                    for instance in instances:
-                        structures.append(StructureDetection(
-                            name=structure_name,
-                            structure_type=self._classify_structure(structure_name),
-                            centroid=instance["centroid"],
-                            bounding_box=instance["bounding_box"],
-                            area=instance["area"],
-                            confidence=0.85,  # Segmentation confidence
-                            is_critical=structure_name in ("blood", "vessels"),
-                            metadata={"source": "segmentation"}
-                        ))
-
-                segmentation_masks = {
-                    k: v.tolist() if hasattr(v, 'tolist') else v
-                    for k, v in masks.items()
-                }
-            except Exception as e:
-                print(f"[AnalysisService] Segmentation error: {e}")
+            print(f"[AnalysisService] Segmentation error: invalid frame ({type(frame).__name__})")
+            run_segmentation = False
 
-        # Run Claude Vision analysis (slower, requires API)
         current_time = time.time()
-        should_run_claude = (
-            self.claude_analyzer and
-            analysis_type in (AnalysisType.CLAUDE_VISION, AnalysisType.HYBRID, AnalysisType.SAFETY_CHECK) and
-            (force_claude or (current_time - self._last_claude_time) >= self.claude_analysis_interval)
+        should_run_claude = run_claude and (
+            force_claude or (current_time - self._last_claude_time) >= self.claude_analysis_interval
         )
 
+        # Identical frames reuse a recent segmentation
+        frame_key = None
+        cached_segmentation = None
+        if cache_segmentation:
+            frame_key = _frame_key(frame)
+            cached_segmentation = self._lookup_segmentation(frame_key, return_masks)
+
+        # Local segmentation runs in a worker thread while Claude is in flight
+        seg_task = None
+        if run_segmentation and cached_segmentation is None:
+            seg_task = asyncio.create_task(
+                asyncio.to_thread(self._run_segmentation, frame, return_masks)
+            )
+
+        claude_result = None
         if should_run_claude:
+            previous_claude_time = self._last_claude_time
+            # Claim the slot before awaiting so concurrent frames don't also call Claude
+            self._last_claude_time = current_time
             try:
-                mode = self.MODE_MAP.get(analysis_type, AnalysisMode.FULL)
-                claude_result = await self.claude_analyzer.analyze_frame(frame, mode)
-                self._last_claude_analysis = claude_result
-                self._last_claude_time = current_time
+                claude_result = await self._submit_claude(frame_id, frame, mode)
+            except Exception as e:
+                print(f"[AnalysisService] Claude analysis error: {e}")
+                self._last_claude_time = previous_claude_time
 
+        if cached_segmentation is not None:
+            cached_structures, segmentation_masks = cached_segmentation
+            structures = list(cached_structures)
+        elif seg_task is not None:
+            try:
+                structures, segmentation_masks = await seg_task
+                if frame_key is not None:
+                    self._store_segmentation(frame_key, structures, segmentation_masks)
+            except Exception as e:
+                print(f"[AnalysisService] Segmentation error: {e}")
+
+        if should_run_claude:
+            if claude_result is not None:
+                fields = self._extract_all(claude_result)
+                self._last_claude_analysis = claude_result
+                self._last_claude_fields = fields
                 raw_analysis = claude_result
 
                 # Extract data from Claude response
                 if "error" not in claude_result:
-                    safety_score = self._extract_safety_score(claude_result)
-                    technique_score = self._extract_technique_score(claude_result)
-                    instruments = self._extract_instruments(claude_result)
-                    alerts = self._extract_alerts(claude_result)
-                    guidance = claude_result.get("guidance") or claude_result.get("real_time_feedback")
-                    voice_alert = claude_result.get("voice_alert") or claude_result.get("voice_feedback")
+                    safety_score = fields["safety_score"]
+                    technique_score = fields["technique_score"]
+                    instruments = fields["instruments"]
+                    alerts = fields["alerts"]
+                    guidance = fields["guidance"]
+                    voice_alert = fields["voice_alert"]
 
                     # Add Claude-detected structures
-                    claude_structures = self._extract_structures(claude_result)
-                    structures.extend(claude_structures)
+                    structures.extend(fields["structures"])
 
-            except Exception as e:
-                print(f"[AnalysisService] Claude analysis error: {e}")
-                # Fall back to cached analysis
-                if self._last_claude_analysis:
-                    raw_analysis = self._last_claude_analysis
+            # Fall back to cached analysis
+            elif self._last_claude_analysis:
+                raw_analysis = self._last_claude_analysis
 
         # Use cached Claude analysis if available and we didn't run new one
-        elif self._last_claude_analysis and analysis_type != AnalysisType.SEGMENTATION_ONLY:
+        elif reuse_claude and self._last_claude_analysis:
             raw_analysis = self._last_claude_analysis
-            safety_score = self._extract_safety_score(self._last_claude_analysis)
-            voice_alert = self._last_claude_analysis.get("voice_alert")
+            safety_score = self._last_claude_fields["safety_score"]
+            voice_alert = self._last_claude_fields["voice_alert"]
+
+        arrays = build_structure_arrays(structures)
 
         # Calculate safety score from structures if not from Claude
         if not raw_analysis:
-            safety_score = self._calculate_safety_score(structures)
+            safety_score = self._calculate_safety_score(StructureBatch.from_arrays(arrays))
 
         processing_time = (time.time() - start_time) * 1000
         self._analysis_count += 1
 
         return AnalysisResult(
             frame_id=frame_id,
-            timestamp=timestamp,
+            timestamp_ns=timestamp_ns,
             processing_time_ms=processing_time,
             analysis_type=analysis_type,
             safety_score=safety_score,
@@ -293,135 +633,280 @@ class AnalysisService:
             guidance=guidance,
             voice_alert=voice_alert,
             segmentation_masks=segmentation_masks,
+            arrays=arrays,
             raw_analysis=raw_analysis
         )
 
-    def _classify_structure(self, name: str) -> str:
+    async def _submit_claude(self, frame_id: int, frame: np.ndarray, mode: "AnalysisMode") -> Dict:
+        """
+        Queue a frame for the Claude batch worker and wait for its result.
+
+        The frame is copied: it can wait in the queue behind a whole API round
+        trip, longer than a pooled camera buffer stays valid.
+        """
+        frame = frame.copy()
+        loop = asyncio.get_running_loop()
+        if self._claude_worker is None or self._claude_worker.get_loop() is not loop or self._claude_worker.done():
+            self._claude_queue = asyncio.Queue()
+            self._claude_worker = loop.create_task(self._claude_batch_worker(self._claude_queue))
+
+        future = loop.create_future()
+        await self._claude_queue.put((frame_id, frame, mode, future))
+        return await future
+
+    async def _claude_batch_worker(self, queue: asyncio.Queue):
+        """Coalesce queued frames into multi-image Claude calls and scatter results."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.CLAUDE_MAX_BATCH and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            # A lone frame goes out at once; the window only applies when
+            # frames are already arriving together
+            if len(batch) > 1:
+                deadline = loop.time() + self.CLAUDE_BATCH_WINDOW_SECONDS
+                while len(batch) < self.CLAUDE_MAX_BATCH:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+            # One API call per analysis mode, frames kept in frame_id order
+            by_mode: Dict[Any, List[Tuple]] = {}
+            for item in sorted(batch, key=lambda item: item[0]):
+                by_mode.setdefault(item[2], []).append(item)
+
+            for mode, items in by_mode.items():
+                try:
+                    results = await self.claude_analyzer.analyze_frames_batch(
+                        [frame for _, frame, _, _ in items], mode
+                    )
+                    self._claude_batches += 1
+                    for (_, _, _, future), result in zip(items, results):
+                        if not future.done():
+                            future.set_result(result)
+                except Exception as e:
+                    for _, _, _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+
+    @staticmethod
+    def _validate_segmenter(segmenter) -> bool:
+        """Run the segmenter once on a dummy frame so failures surface at startup."""
+        dummy = np.zeros((64, 64, 3), dtype=np.uint8)
+        try:
+            masks = segmenter.segment_all(dummy)
+        except Exception as e:
+            print(f"[AnalysisService] Warning: Segmenter failed validation: {e}")
+            return False
+        if not isinstance(masks, dict):
+            print("[AnalysisService] Warning: Segmenter returned unexpected output, disabling")
+            return False
+        return True
+
+    def _scratch_buffer(self, name: str, shape: Tuple[int, ...], dtype: Any) -> np.ndarray:
+        """Return this thread's reusable buffer, reallocating only when shape/dtype change."""
+        buffer = getattr(self._scratch, name, None)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            setattr(self._scratch, name, buffer)
+        return buffer
+
+    def _run_segmentation(
+        self,
+        frame: np.ndarray,
+        return_masks: bool
+    ) -> Tuple[List[StructureDetection], Optional[SegmentationMasks]]:
+        """Run local segmentation and convert components to StructureDetection objects."""
+        masks = self._segment_all(frame)
+        segmentation_masks = SegmentationMasks(masks) if return_masks else None
+
+        # Identical segmenter output means identical detections
+        mask_hash = _hash_masks(masks)
+        last_output = self._last_seg_output
+        if last_output is not None and last_output[0] == mask_hash:
+            return list(last_output[1]), segmentation_masks
+
+        # One connected-components pass per mask yields bbox, area and centroid.
+        # Segmenter masks are already 0/255 uint8, so they are labelled in place
+        # without a separate binarization pass.
+        structures = []
+        for structure_name, mask in masks.items():
+            if mask.dtype != np.uint8:
+                mask = (mask > 0).view(np.uint8)
+            count, _, stats, centroids = cv2.connectedComponentsWithStats(
+                mask, labels=self._scratch_buffer("labels", mask.shape, np.int32),
+                connectivity=8, ltype=cv2.CV_32S
+            )
+            if count <= 1:
+                continue
+            structure_type = self._classify_structure(structure_name)
+            is_critical = structure_name in ("blood", "vessels")
+            # Convert all components at once; label 0 is background
+            component_stats = stats[1:].tolist()
+            component_centroids = centroids[1:].astype(np.int32).tolist()
+            for (x, y, w, h, area), (cx, cy) in zip(component_stats, component_centroids):
+                structures.append(StructureDetection(
+                    name=structure_name,
+                    structure_type=structure_type,
+                    centroid=(cx, cy),
+                    bounding_box=(x, y, w, h),
+                    area=area,
+                    confidence=0.85,  # Segmentation confidence
+                    is_critical=is_critical,
+                    metadata={"source": "segmentation"}
+                ))
+
+        self._last_seg_output = (mask_hash, list(structures))
+        return structures, segmentation_masks
+
+    def _lookup_segmentation(
+        self,
+        frame_key: Tuple,
+        need_masks: bool
+    ) -> Optional[Tuple[List[StructureDetection], Optional[SegmentationMasks]]]:
+        """Return cached segmentation for an identical frame, if still fresh."""
+        entry = self._hash_cache.get(frame_key)
+        if entry is None:
+            return None
+        stored_at, hits, structures, masks = entry
+        if (time.monotonic() - stored_at > self.HASH_CACHE_MAX_AGE_SECONDS
+                or hits >= self.HASH_CACHE_MAX_HITS):
+            del self._hash_cache[frame_key]
+            return None
+        if need_masks and masks is None:
+            return None
+        self._hash_cache[frame_key] = (stored_at, hits + 1, structures, masks)
+        self._hash_cache.move_to_end(frame_key)
+        self._hash_cache_hits += 1
+        return structures, masks
+
+    def _store_segmentation(
+        self,
+        frame_key: Tuple,
+        structures: List[StructureDetection],
+        masks: Optional[SegmentationMasks]
+    ):
+        """Remember segmentation output for a frame key (LRU, bounded)."""
+        self._hash_cache[frame_key] = (time.monotonic(), 0, list(structures), masks)
+        self._hash_cache.move_to_end(frame_key)
+        while len(self._hash_cache) > self.HASH_CACHE_SIZE:
+            self._hash_cache.popitem(last=False)
+
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _classify_structure(name: str) -> str:
         """Classify structure type from name."""
-        classifications = {
-            "tumor": "pathology",
-            "blood": "vessel",
-            "tissue": "parenchyma",
-            "instrument": "instrument",
-            "csf": "csf_space",
-            "enhancement": "pathology",
-            "edema": "pathology",
-            "parenchyma": "parenchyma",
-            "necrotic": "pathology"
+        return STRUCTURE_CLASSIFICATIONS.get(name.lower(), "other")
+
+    def _extract_all(self, analysis: Dict) -> Dict[str, Any]:
+        """Walk EXTRACT_SCHEMA once and return every field used from a Claude response."""
+        raw: Dict[str, Any] = {}
+        for name, (paths, mode) in EXTRACT_SCHEMA.items():
+            collected = [] if mode == "all" else None
+            for path in paths:
+                value = analysis
+                for key in path:
+                    if not isinstance(value, dict) or key not in value:
+                        value = None
+                        break
+                    value = value[key]
+                if value is None:
+                    continue
+                if mode == "first":
+                    collected = value
+                    break
+                # Instruments may come as {"identified": [...], "active": [...]}
+                if isinstance(value, dict) and "identified" in value:
+                    value = value["identified"]
+                if isinstance(value, list):
+                    collected.extend(value)
+            raw[name] = collected
+
+        structures = self._structures_from_claude(
+            [item for item in raw["structures"] if isinstance(item, dict)]
+        )
+        structures.extend(
+            StructureDetection(
+                name=item.get("name", "unknown"),
+                structure_type=item.get("type", "anatomy"),
+                centroid=(0, 0),
+                bounding_box=(0, 0, 0, 0),
+                area=0,
+                confidence=item.get("confidence", 0.5),
+                is_critical=item.get("safety_critical", False),
+                metadata={"source": "claude_vision"}
+            )
+            for item in raw["anatomy_structures"] if isinstance(item, dict)
+        )
+
+        return {
+            "safety_score": float(raw["safety_score"]) if raw["safety_score"] is not None else 100.0,
+            "technique_score": float(raw["technique_score"]) if raw["technique_score"] is not None else None,
+            "instruments": raw["instruments"],
+            "alerts": [
+                {"message": item, "severity": "warning"} if isinstance(item, str) else item
+                for item in raw["alerts"]
+            ],
+            "structures": structures,
+            "guidance": raw["guidance"] or None,
+            "voice_alert": raw["voice_alert"] or None,
         }
-        return classifications.get(name.lower(), "other")
-
-    def _extract_safety_score(self, analysis: Dict) -> float:
-        """Extract safety score from Claude analysis."""
-        if "safety_score" in analysis:
-            return float(analysis["safety_score"])
-        if "safety" in analysis and "safety_score" in analysis["safety"]:
-            return float(analysis["safety"]["safety_score"])
-        return 100.0
-
-    def _extract_technique_score(self, analysis: Dict) -> Optional[float]:
-        """Extract technique score from Claude analysis."""
-        if "overall_score" in analysis:
-            return float(analysis["overall_score"])
-        if "technique" in analysis and "quality_score" in analysis["technique"]:
-            return float(analysis["technique"]["quality_score"])
-        return None
-
-    def _extract_instruments(self, analysis: Dict) -> List[Dict]:
-        """Extract instrument detections from Claude analysis."""
-        instruments = []
-
-        for key in ["instruments", "instruments_visible", "instruments_detected"]:
-            if key in analysis:
-                items = analysis[key]
-                if isinstance(items, list):
-                    instruments.extend(items)
-                elif isinstance(items, dict) and "identified" in items:
-                    instruments.extend(items["identified"])
-
-        return instruments
-
-    def _extract_alerts(self, analysis: Dict) -> List[Dict]:
-        """Extract alerts from Claude analysis."""
-        alerts = []
-
-        for key in ["alerts", "critical_alerts", "warnings", "proximity_warnings"]:
-            if key in analysis:
-                items = analysis[key]
-                if isinstance(items, list):
-                    for item in items:
-                        if isinstance(item, str):
-                            alerts.append({"message": item, "severity": "warning"})
-                        else:
-                            alerts.append(item)
-
-        return alerts
-
-    def _extract_structures(self, analysis: Dict) -> List[StructureDetection]:
-        """Extract structure detections from Claude analysis."""
-        structures = []
 
-        for key in ["structures_identified", "structures", "regions"]:
-            if key in analysis:
-                for item in analysis[key]:
-                    if isinstance(item, dict):
-                        # Parse bounding box if available
-                        bbox = item.get("bounding_box", [0, 0, 100, 100])
-                        if len(bbox) == 4:
-                            # Convert percentage to pixels (assume 1000x1000 normalized)
-                            x, y = int(bbox[0] * 10), int(bbox[1] * 10)
-                            w, h = int((bbox[2] - bbox[0]) * 10), int((bbox[3] - bbox[1]) * 10)
-                        else:
-                            x, y, w, h = 0, 0, 100, 100
-
-                        structures.append(StructureDetection(
-                            name=item.get("name", "unknown"),
-                            structure_type=item.get("type", "other"),
-                            centroid=(x + w // 2, y + h // 2),
-                            bounding_box=(x, y, w, h),
-                            area=w * h,
-                            confidence=item.get("confidence", 0.5),
-                            is_critical=item.get("safety_critical", False),
-                            safety_margin_mm=item.get("safety_margin_mm"),
-                            metadata={"source": "claude_vision"}
-                        ))
-
-        # Check anatomy section
-        if "anatomy" in analysis and "structures" in analysis["anatomy"]:
-            for item in analysis["anatomy"]["structures"]:
-                if isinstance(item, dict):
-                    structures.append(StructureDetection(
-                        name=item.get("name", "unknown"),
-                        structure_type=item.get("type", "anatomy"),
-                        centroid=(0, 0),
-                        bounding_box=(0, 0, 0, 0),
-                        area=0,
-                        confidence=item.get("confidence", 0.5),
-                        is_critical=item.get("safety_critical", False),
-                        metadata={"source": "claude_vision"}
-                    ))
-
-        return structures
-
-    def _calculate_safety_score(self, structures: List[StructureDetection]) -> float:
+    @staticmethod
+    def _structures_from_claude(items: List[Dict]) -> List[StructureDetection]:
+        """Convert Claude structure entries to StructureDetections in one vectorized pass."""
+        if not items:
+            return []
+
+        # Gather bounding boxes (percentages) so the pixel conversion runs once over (N, 4)
+        bboxes = []
+        for item in items:
+            bbox = item.get("bounding_box", [0, 0, 100, 100])
+            # Malformed boxes fall back to a 100x100 px box at the origin
+            bboxes.append(bbox if len(bbox) == 4 else (0, 0, 10, 10))
+
+        # Convert percentage to pixels (assume 1000x1000 normalized)
+        boxes = np.asarray(bboxes, dtype=np.float64)
+        xy = (boxes[:, :2] * 10).astype(np.int64)
+        wh = ((boxes[:, 2:] - boxes[:, :2]) * 10).astype(np.int64)
+        centroids = (xy + wh // 2).tolist()
+        areas = (wh[:, 0] * wh[:, 1]).tolist()
+        xy = xy.tolist()
+        wh = wh.tolist()
+
+        return [
+            StructureDetection(
+                name=item.get("name", "unknown"),
+                structure_type=item.get("type", "other"),
+                centroid=(cx, cy),
+                bounding_box=(x, y, w, h),
+                area=area,
+                confidence=item.get("confidence", 0.5),
+                is_critical=item.get("safety_critical", False),
+                safety_margin_mm=item.get("safety_margin_mm"),
+                metadata={"source": "claude_vision"}
+            )
+            for item, (x, y), (w, h), (cx, cy), area in zip(items, xy, wh, centroids, areas)
+        ]
+
+    def _calculate_safety_score(self, batch: StructureBatch) -> float:
         """Calculate safety score from detected structures."""
-        score = 100.0
-
-        for structure in structures:
-            if structure.is_critical:
-                # Reduce score based on proximity/size of critical structures
-                score -= min(20, structure.area / 1000)
-
-            if structure.structure_type == "pathology":
-                score -= 5
-
-        return max(0, min(100, score))
+        # Reduce score based on proximity/size of critical structures
+        penalty = np.minimum(20.0, batch.areas / 1000.0)
+        score = 100.0 - penalty[batch.critical_mask].sum() - 5.0 * np.count_nonzero(batch.pathology_mask)
+        return float(np.clip(score, 0, 100))
 
     def validate_trajectory(
         self,
         trajectory: List[Tuple[int, int]],
         structures: List[StructureDetection],
-        safety_margin_px: int = 50
+        safety_margin_px: int = 50,
+        arrays: Optional[Dict[str, np.ndarray]] = None
     ) -> Dict[str, Any]:
         """
         Validate a surgical trajectory against detected structures.
@@ -430,37 +915,45 @@ class AnalysisService:
             trajectory: List of (x, y) points defining the trajectory
             structures: List of detected structures
             safety_margin_px: Minimum safe distance from critical structures
+            arrays: Precomputed AnalysisResult.arrays for the same structures
 
         Returns:
             Validation result with warnings and recommendations
         """
-        warnings = []
-        is_safe = True
-        min_distance_to_critical = float('inf')
-
-        for point in trajectory:
-            for structure in structures:
-                if structure.is_critical:
-                    # Calculate distance to structure centroid
-                    dist = np.sqrt(
-                        (point[0] - structure.centroid[0])**2 +
-                        (point[1] - structure.centroid[1])**2
-                    )
-
-                    min_distance_to_critical = min(min_distance_to_critical, dist)
-
-                    if dist < safety_margin_px:
-                        is_safe = False
-                        warnings.append({
-                            "structure": structure.name,
-                            "distance_px": int(dist),
-                            "point": point,
-                            "severity": "critical" if dist < safety_margin_px / 2 else "warning"
-                        })
-
+        if arrays is None:
+            arrays = build_structure_arrays(structures)
+        critical_idx = np.flatnonzero(arrays["critical"])
+        if not trajectory or critical_idx.size == 0:
+            return {
+                "is_safe": True,
+                "min_distance_to_critical_px": None,
+                "warnings": [],
+                "recommendation": "Clear trajectory"
+            }
+
+        # Squared distances for every (trajectory point, critical structure) pair
+        points = np.asarray(trajectory, dtype=np.float64).reshape(-1, 2)
+        centroids = arrays["centroids"][critical_idx].astype(np.float64)
+        diff = points[:, None, :] - centroids[None, :, :]
+        dist2 = np.einsum('ijk,ijk->ij', diff, diff)
+
+        # Warnings are only built for the pairs inside the margin
+        hits = np.argwhere(dist2 < safety_margin_px ** 2)
+        hit_dist = np.sqrt(dist2[hits[:, 0], hits[:, 1]])
+        warnings = [
+            {
+                "structure": structures[critical_idx[j]].name,
+                "distance_px": int(dist),
+                "point": trajectory[i],
+                "severity": "critical" if dist < safety_margin_px / 2 else "warning"
+            }
+            for (i, j), dist in zip(hits.tolist(), hit_dist.tolist())
+        ]
+
+        is_safe = not warnings
         return {
             "is_safe": is_safe,
-            "min_distance_to_critical_px": int(min_distance_to_critical) if min_distance_to_critical != float('inf') else None,
+            "min_distance_to_critical_px": int(np.sqrt(dist2.min())),
             "warnings": warnings,
             "recommendation": "Clear trajectory" if is_safe else "Adjust trajectory to avoid critical structures"
         }
@@ -473,6 +966,8 @@ class AnalysisService:
             "claude_available": self.claude_analyzer is not None,
             "modality": self.modality,
             "analysis_count": self._analysis_count,
+            "segmentation_cache_hits": self._hash_cache_hits,
+            "claude_batches": self._claude_batches,
             "claude_interval_seconds": self.claude_analysis_interval,
             "last_claude_analysis_age": time.time() - self._last_claude_time if self._last_claude_time else None
         }
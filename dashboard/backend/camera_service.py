@@ -8,22 +8,44 @@ Optimized for real-time surgical dashboard streaming.
 
 Features:
 - Background thread capture with configurable FPS
-- Frame queue with overflow handling (30 frames)
+- Frame ring buffer with overflow handling (32 frames)
 - Base64 JPEG encoding for WebSocket transmission
 - Multiple camera source support (webcam, IP camera, video file)
 """
 
 import cv2
 import base64
+import sys
 import time
+from math import sin
 import threading
-from queue import Queue, Empty
 from datetime import datetime
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import asyncio
 
+import numpy as np
+
+try:
+    import simplejpeg
+    SIMPLEJPEG_AVAILABLE = True
+except ImportError:
+    SIMPLEJPEG_AVAILABLE = False
+
+try:
+    import pybase64
+    PYBASE64_AVAILABLE = True
+except ImportError:
+    PYBASE64_AVAILABLE = False
+
+
+def _b64encode_str(data) -> str:
+    """Base64-encode a bytes-like object to str (SIMD pybase64 when installed)."""
+    if PYBASE64_AVAILABLE:
+        return pybase64.b64encode_as_string(data)
+    return base64.b64encode(data).decode('utf-8')
+
 
 class CameraSourceType(Enum):
     """Supported camera source types."""
@@ -38,20 +60,34 @@ class CapturedFrame:
     """Container for a captured camera frame."""
     frame_id: int
     timestamp: datetime
-    raw_frame: Any  # numpy array
+    raw_frame: Any  # numpy array (BGR image, or JPEG bytes when is_jpeg)
     encoded_base64: Optional[str] = None
     width: int = 0
     height: int = 0
+    is_jpeg: bool = False  # raw_frame is the camera's compressed MJPG frame
 
     def encode_to_base64(self, quality: int = 85) -> str:
         """Encode raw frame to base64 JPEG."""
         if self.encoded_base64 is None:
-            _, buffer = cv2.imencode(
-                '.jpg',
-                self.raw_frame,
-                [cv2.IMWRITE_JPEG_QUALITY, quality]
-            )
-            self.encoded_base64 = base64.b64encode(buffer).decode('utf-8')
+            if self.is_jpeg:
+                # Already JPEG from the camera, no re-encode
+                buffer = self.raw_frame
+            elif SIMPLEJPEG_AVAILABLE and self.raw_frame.ndim == 3 and self.raw_frame.shape[2] == 3:
+                # libjpeg-turbo directly on the numpy buffer
+                buffer = simplejpeg.encode_jpeg(
+                    np.ascontiguousarray(self.raw_frame),
+                    quality=quality,
+                    colorspace='BGR',
+                    fastdct=True
+                )
+            else:
+                _, buffer = cv2.imencode(
+                    '.jpg',
+                    self.raw_frame,
+                    [cv2.IMWRITE_JPEG_QUALITY, quality]
+                )
+            # Encode straight from the buffer without a bytes() copy
+            self.encoded_base64 = _b64encode_str(memoryview(buffer).cast('B'))
         return self.encoded_base64
 
     def to_dict(self, include_frame: bool = True) -> Dict[str, Any]:
@@ -77,7 +113,7 @@ class CameraService:
 
     DEFAULT_RESOLUTION = (1280, 720)
     DEFAULT_FPS = 30
-    QUEUE_MAX_SIZE = 30
+    QUEUE_MAX_SIZE = 32  # Ring buffer slots, must be a power of two
 
     def __init__(
         self,
@@ -85,19 +121,21 @@ class CameraService:
         source_path: str = "0",
         target_fps: int = DEFAULT_FPS,
         resolution: Tuple[int, int] = DEFAULT_RESOLUTION,
-        jpeg_quality: int = 85
+        jpeg_quality: int = 85,
+        passthrough_jpeg: bool = False
     ):
         self.source_type = source_type
         self.source_path = source_path
         self.target_fps = target_fps
         self.resolution = resolution
         self.jpeg_quality = jpeg_quality
+        # Forward the webcam's MJPG frames undecoded (raw_frame holds JPEG bytes)
+        self.passthrough_jpeg = passthrough_jpeg
 
         # State
         self.cap: Optional[cv2.VideoCapture] = None
         self.is_running = False
         self.is_paused = False
-        self.frame_queue: Queue[CapturedFrame] = Queue(maxsize=self.QUEUE_MAX_SIZE)
         self.capture_thread: Optional[threading.Thread] = None
 
         # Statistics
@@ -109,6 +147,24 @@ class CameraService:
         # Lock for thread-safe operations
         self._lock = threading.Lock()
 
+        # Frame ring buffer: single producer (capture thread), readers index it
+        # directly. Indices grow monotonically; slot = index & _ring_mask.
+        self._slots: List[Optional[CapturedFrame]] = [None] * self.QUEUE_MAX_SIZE
+        self._ring_mask = self.QUEUE_MAX_SIZE - 1
+        self._write_idx = 0  # Next slot the producer writes
+        self._read_idx = 0   # Next slot get_frame() returns
+        self._frame_ready = threading.Event()
+
+        # One frame buffer per ring slot, reused each time the ring wraps. A
+        # frame's raw_frame stays valid until QUEUE_MAX_SIZE newer frames have
+        # been captured; consumers holding frames longer must copy them.
+        self._frame_pool: List[Optional[np.ndarray]] = [None] * self.QUEUE_MAX_SIZE
+        self._last_latest_id = 0  # frame_id last returned by get_latest_frame()
+
+        # Broadcast to asyncio consumers; bound to the loop of the first wait_for_frame() call
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._frame_event: Optional[asyncio.Event] = None
+
     def start(self) -> bool:
         """
         Start camera capture in background thread.
@@ -131,7 +187,10 @@ class CameraService:
             return True
 
         if self.source_type == CameraSourceType.WEBCAM:
-            self.cap = cv2.VideoCapture(int(self.source_path))
+            if sys.platform.startswith("linux"):
+                self.cap = cv2.VideoCapture(int(self.source_path), cv2.CAP_V4L2)
+            else:
+                self.cap = cv2.VideoCapture(int(self.source_path))
         elif self.source_type in (CameraSourceType.IP_CAMERA, CameraSourceType.VIDEO_FILE):
             self.cap = cv2.VideoCapture(self.source_path)
 
@@ -140,6 +199,13 @@ class CameraService:
             return False
 
         # Configure camera
+        if self.source_type == CameraSourceType.WEBCAM:
+            # Camera-side MJPEG saves USB bandwidth at 1280x720
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+            if self.passthrough_jpeg:
+                self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        # Keep only the newest frame in the driver so read() isn't frames behind
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
         self.cap.set(cv2.CAP_PROP_FPS, self.target_fps)
@@ -159,18 +225,20 @@ class CameraService:
 
     def _capture_loop(self):
         """Background thread main capture loop."""
-        frame_interval = 1.0 / self.target_fps
+        frame_interval_ns = int(1e9 / self.target_fps)
+        next_deadline = time.monotonic_ns() + frame_interval_ns
         fps_sample_count = 0
-        fps_sample_start = time.time()
+        fps_sample_start = time.monotonic()
 
         while self.is_running:
-            loop_start = time.time()
-
             if self.is_paused:
                 time.sleep(0.1)
                 continue
 
-            ret, frame = self.cap.read()
+            # Decode into the pooled buffer for this frame's ring slot
+            slot = self._claim_slot()
+            pooled = self._frame_pool[slot]
+            ret, frame = self.cap.read(pooled) if pooled is not None else self.cap.read()
 
             if not ret:
                 if self.source_type == CameraSourceType.VIDEO_FILE:
@@ -182,6 +250,9 @@ class CameraService:
                     time.sleep(0.1)
                     continue
 
+            # OpenCV allocates a new array if the pooled one doesn't fit
+            self._frame_pool[slot] = frame
+
             with self._lock:
                 self.frame_count += 1
                 frame_id = self.frame_count
@@ -189,43 +260,52 @@ class CameraService:
             # Calculate actual FPS
             fps_sample_count += 1
             if fps_sample_count >= 30:
-                elapsed = time.time() - fps_sample_start
+                elapsed = time.monotonic() - fps_sample_start
                 self.actual_fps = fps_sample_count / elapsed if elapsed > 0 else 0
                 fps_sample_count = 0
-                fps_sample_start = time.time()
-
-            # Create frame object
-            captured = CapturedFrame(
-                frame_id=frame_id,
-                timestamp=datetime.now(),
-                raw_frame=frame,
-                width=frame.shape[1],
-                height=frame.shape[0]
-            )
-
-            # Queue management: drop oldest if full
-            if self.frame_queue.full():
-                try:
-                    self.frame_queue.get_nowait()
-                    self.dropped_frames += 1
-                except Empty:
-                    pass
-
-            self.frame_queue.put(captured)
+                fps_sample_start = time.monotonic()
+
+            # Create frame object. With CONVERT_RGB off the driver hands back
+            # the compressed MJPG frame as a flat byte array.
+            if frame.ndim == 1:
+                captured = CapturedFrame(
+                    frame_id=frame_id,
+                    timestamp=datetime.now(),
+                    raw_frame=frame,
+                    width=self.resolution[0],
+                    height=self.resolution[1],
+                    is_jpeg=True
+                )
+            else:
+                captured = CapturedFrame(
+                    frame_id=frame_id,
+                    timestamp=datetime.now(),
+                    raw_frame=frame,
+                    width=frame.shape[1],
+                    height=frame.shape[0]
+                )
+            # Encode here so consumers on the event loop only read the cached string
+            captured.encode_to_base64(self.jpeg_quality)
+
+            self._publish(captured)
 
             # Maintain target FPS
-            elapsed = time.time() - loop_start
-            if elapsed < frame_interval:
-                time.sleep(frame_interval - elapsed)
+            next_deadline = self._sleep_until(next_deadline, frame_interval_ns)
 
     def _synthetic_capture_loop(self):
         """Generate synthetic frames for testing without camera."""
-        import numpy as np
-        frame_interval = 1.0 / self.target_fps
+        frame_interval_ns = int(1e9 / self.target_fps)
+        next_deadline = time.monotonic_ns() + frame_interval_ns
 
-        while self.is_running:
-            loop_start = time.time()
+        # Dark reddish background (surgical field), filled once
+        background = np.full((self.resolution[1], self.resolution[0], 3), (30, 20, 60), dtype=np.uint8)
+        center_x, center_y = self.resolution[0] // 2, self.resolution[1] // 2
+
+        # Drawing calls bound once for the loop
+        draw_circle, draw_line, draw_text = cv2.circle, cv2.line, cv2.putText
+        font = cv2.FONT_HERSHEY_SIMPLEX
 
+        while self.is_running:
             if self.is_paused:
                 time.sleep(0.1)
                 continue
@@ -234,57 +314,100 @@ class CameraService:
                 self.frame_count += 1
                 frame_id = self.frame_count
 
-            # Generate synthetic surgical-like frame
-            frame = np.zeros((self.resolution[1], self.resolution[0], 3), dtype=np.uint8)
-
-            # Dark reddish background (surgical field)
-            frame[:, :] = (30, 20, 60)
-
-            # Add some structure
-            center_x, center_y = self.resolution[0] // 2, self.resolution[1] // 2
+            # Generate synthetic surgical-like frame in this ring slot's pooled buffer
+            slot = self._claim_slot()
+            frame = self._frame_pool[slot]
+            if frame is None:
+                frame = self._frame_pool[slot] = np.empty_like(background)
+            np.copyto(frame, background)
 
             # Pulsing circle (simulating heartbeat in tissue)
-            pulse = int(20 * np.sin(time.time() * 5) + 100)
-            cv2.circle(frame, (center_x, center_y), pulse, (50, 50, 120), -1)
+            pulse = int(20 * sin(time.time() * 5) + 100)
+            draw_circle(frame, (center_x, center_y), pulse, (50, 50, 120), -1)
 
             # Instrument-like shapes
-            instrument_y = center_y + int(50 * np.sin(time.time() * 2))
-            cv2.line(frame, (center_x - 200, instrument_y), (center_x - 50, center_y), (180, 180, 200), 4)
+            instrument_y = center_y + int(50 * sin(time.time() * 2))
+            draw_line(frame, (center_x - 200, instrument_y), (center_x - 50, center_y), (180, 180, 200), 4)
 
             # Add frame info
-            cv2.putText(
+            draw_text(
                 frame,
                 f"SYNTHETIC FEED - Frame {frame_id}",
                 (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2
+                font, 0.7, (0, 255, 0), 2
             )
-            cv2.putText(
+            now = datetime.now()
+            draw_text(
                 frame,
-                datetime.now().strftime("%H:%M:%S.%f")[:-3],
+                now.strftime("%H:%M:%S.%f")[:-3],
                 (10, 60),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1
+                font, 0.5, (200, 200, 200), 1
             )
 
             captured = CapturedFrame(
                 frame_id=frame_id,
-                timestamp=datetime.now(),
+                timestamp=now,
                 raw_frame=frame,
                 width=frame.shape[1],
                 height=frame.shape[0]
             )
+            captured.encode_to_base64(self.jpeg_quality)
+
+            self._publish(captured)
+
+            next_deadline = self._sleep_until(next_deadline, frame_interval_ns)
 
-            if self.frame_queue.full():
-                try:
-                    self.frame_queue.get_nowait()
+    @staticmethod
+    def _sleep_until(deadline_ns: int, interval_ns: int) -> int:
+        """
+        Sleep until a monotonic deadline and return the next one.
+
+        Deadlines advance by a fixed interval so a slow frame is made up on the
+        following ones; if capture falls more than a frame behind (e.g. after a
+        pause) the schedule restarts from now instead of bursting to catch up.
+        """
+        now = time.monotonic_ns()
+        sleep_ns = deadline_ns - now
+        if sleep_ns > 0:
+            time.sleep(sleep_ns / 1e9)
+        elif -sleep_ns > interval_ns:
+            return now + interval_ns
+        return deadline_ns + interval_ns
+
+    def _claim_slot(self) -> int:
+        """
+        Return the ring slot for the next frame, ready for its buffer to be reused.
+
+        If the ring is full the slot still holds the oldest unread frame; it
+        is dropped from the get_frame() queue first, so no reader can take it
+        while its pooled buffer is being overwritten.
+        """
+        write_idx = self._write_idx
+        if write_idx - self._read_idx >= self.QUEUE_MAX_SIZE:
+            with self._lock:
+                if write_idx - self._read_idx >= self.QUEUE_MAX_SIZE:
+                    self._read_idx = write_idx - self.QUEUE_MAX_SIZE + 1
                     self.dropped_frames += 1
-                except Empty:
-                    pass
+        return write_idx & self._ring_mask
 
-            self.frame_queue.put(captured)
+    def _publish(self, captured: CapturedFrame):
+        """Write a frame into the slot returned by _claim_slot()."""
+        write_idx = self._write_idx
+        self._slots[write_idx & self._ring_mask] = captured
+        self._write_idx = write_idx + 1
+        self._frame_ready.set()
 
-            elapsed = time.time() - loop_start
-            if elapsed < frame_interval:
-                time.sleep(frame_interval - elapsed)
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._notify_frame)
+            except RuntimeError:
+                # Event loop closed
+                self._loop = None
+
+    def _notify_frame(self):
+        """Wake every wait_for_frame() caller (runs on the event loop)."""
+        event, self._frame_event = self._frame_event, asyncio.Event()
+        event.set()
 
     def get_frame(self, timeout: float = 0.1) -> Optional[CapturedFrame]:
         """
@@ -296,31 +419,93 @@ class CameraService:
         Returns:
             CapturedFrame or None if no frame available.
         """
-        try:
-            return self.frame_queue.get(timeout=timeout)
-        except Empty:
-            return None
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                frame = self._pop_frame()
+                if frame is not None:
+                    return frame
+                self._frame_ready.clear()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._frame_ready.wait(remaining):
+                return None
+
+    def _pop_frame(self) -> Optional[CapturedFrame]:
+        """Take the next unread frame from the ring (caller holds self._lock)."""
+        read_idx = self._read_idx
+        if read_idx < self._write_idx:
+            self._read_idx = read_idx + 1
+            return self._slots[read_idx & self._ring_mask]
+        return None
 
     def get_latest_frame(self) -> Optional[CapturedFrame]:
         """
-        Get the most recent frame, discarding older ones.
+        Get the most recent frame.
+
+        A single indexed read of the newest slot; it does not consume frames
+        from the get_frame() queue.
 
         Returns:
-            Latest CapturedFrame or None if queue is empty.
+            Latest CapturedFrame, or None if there is no frame newer than the
+            one returned by the previous call.
         """
-        latest = None
-        try:
-            while True:
-                latest = self.frame_queue.get_nowait()
-        except Empty:
-            pass
+        latest = self._slots[(self._write_idx - 1) & self._ring_mask]
+        if latest is None or latest.frame_id == self._last_latest_id:
+            return None
+        self._last_latest_id = latest.frame_id
         return latest
 
+    async def wait_for_frame(self, last_frame_id: int = 0) -> CapturedFrame:
+        """
+        Wait for a frame newer than last_frame_id.
+
+        Every waiter receives the same CapturedFrame (already encoded in the
+        capture thread), so any number of clients share one encode per frame.
+
+        Args:
+            last_frame_id: frame_id of the frame the caller already has.
+
+        Returns:
+            The latest CapturedFrame.
+        """
+        self._bind_loop()
+        while True:
+            event = self._frame_event
+            latest = self._slots[(self._write_idx - 1) & self._ring_mask]
+            if latest is not None and latest.frame_id > last_frame_id:
+                return latest
+            await event.wait()
+
     async def get_frame_async(self, timeout: float = 0.1) -> Optional[CapturedFrame]:
-        """Async wrapper for get_frame."""
-        return await asyncio.get_event_loop().run_in_executor(
-            None, lambda: self.get_frame(timeout)
-        )
+        """
+        Async version of get_frame.
+
+        Waits on the capture thread's frame notification instead of blocking
+        an executor thread.
+        """
+        self._bind_loop()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            # Take the event before checking so a frame published in between still wakes us
+            event = self._frame_event
+            with self._lock:
+                frame = self._pop_frame()
+            if frame is not None:
+                return frame
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    def _bind_loop(self):
+        """Bind frame notifications to the running event loop (first async caller wins)."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._frame_event = asyncio.Event()
 
     def pause(self):
         """Pause frame capture."""
@@ -343,14 +528,17 @@ class CameraService:
             self.cap = None
 
         # Clear queue
-        while not self.frame_queue.empty():
-            try:
-                self.frame_queue.get_nowait()
-            except Empty:
-                break
+        with self._lock:
+            self._slots = [None] * self.QUEUE_MAX_SIZE
+            self._read_idx = self._write_idx
 
         print(f"[CameraService] Stopped. Captured {self.frame_count} frames, dropped {self.dropped_frames}")
 
+    @property
+    def queue_size(self) -> int:
+        """Unread frames in the ring; read without locking (approximate under concurrent capture)."""
+        return max(0, self._write_idx - self._read_idx)
+
     def get_status(self) -> Dict[str, Any]:
         """Get current camera service status."""
         return {
@@ -363,7 +551,7 @@ class CameraService:
             "actual_fps": round(self.actual_fps, 1),
             "frame_count": self.frame_count,
             "dropped_frames": self.dropped_frames,
-            "queue_size": self.frame_queue.qsize(),
+            "queue_size": self.queue_size,
             "uptime_seconds": (datetime.now() - self.start_time).total_seconds() if self.start_time else 0
         }
 
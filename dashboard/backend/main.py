@@ -26,7 +26,6 @@ import asyncio
 import json
 import os
 import time
-import random
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Set
 from contextlib import asynccontextmanager
@@ -34,8 +33,15 @@ from pathlib import Path
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 try:
     from dotenv import load_dotenv
@@ -44,6 +50,8 @@ try:
 except ImportError:
     pass
 
+from camera_service import CameraService, CapturedFrame, get_camera_service
+
 # Voice service integration
 from voice_service import (
     get_voice_service,
@@ -53,8 +61,9 @@ from voice_service import (
     SurgicalAlerts,
 )
 
-# Global voice service instance
+# Global service instances
 voice_service: Optional[VoiceService] = None
+camera_service: Optional[CameraService] = None
 
 # Configuration from environment
 BACKEND_HOST = os.getenv("BACKEND_HOST", "0.0.0.0")
@@ -75,6 +84,8 @@ class AlertPriority:
 class ClientConnection:
     """Represents a connected WebSocket client."""
 
+    RNG_POOL_SIZE = 1024  # Random values drawn per refill
+
     def __init__(self, websocket: WebSocket, client_id: str):
         self.websocket = websocket
         self.client_id = client_id
@@ -83,6 +94,24 @@ class ClientConnection:
         self.analysis_mode: str = "FULL"
         self.connected_at: datetime = datetime.now()
 
+        # Synthetic data randomness, drawn from numpy in batches
+        self._rng = np.random.default_rng()
+        self._rng_pool: List[float] = []
+        self._rng_idx = 0
+
+    def random(self) -> float:
+        """Next uniform [0, 1) value from the pre-drawn pool."""
+        if self._rng_idx >= len(self._rng_pool):
+            self._rng_pool = self._rng.random(self.RNG_POOL_SIZE).tolist()
+            self._rng_idx = 0
+        value = self._rng_pool[self._rng_idx]
+        self._rng_idx += 1
+        return value
+
+    def uniform_tenths(self, low: int, high: int) -> float:
+        """Uniform value in [low, high) quantized to 0.1 with integer math (no round())."""
+        return (low * 10 + int(self.random() * (high - low) * 10)) / 10
+
     def should_receive_alert(self, priority: int) -> bool:
         """Determine if client should receive alert based on role."""
         if self.muted:
@@ -95,6 +124,62 @@ class ClientConnection:
 # Connected WebSocket clients
 connected_clients: Dict[str, ClientConnection] = {}
 
+# Unmuted clients bucketed by role, kept in sync on connect/role/mute changes
+clients_by_role: Dict[str, Set[ClientConnection]] = {"surgeon": set(), "nurse": set(), "trainee": set()}
+
+
+def _update_client_bucket(client: ClientConnection, role: Optional[str] = None, muted: Optional[bool] = None):
+    """Apply a role/mute change and move the client between alert buckets."""
+    clients_by_role[client.role].discard(client)
+    if role is not None:
+        client.role = role
+    if muted is not None:
+        client.muted = muted
+    if not client.muted:
+        clients_by_role[client.role].add(client)
+
+
+def alert_recipients(priority: int) -> Set[ClientConnection]:
+    """Clients that should receive an alert (same rules as ClientConnection.should_receive_alert)."""
+    if priority == AlertPriority.CRITICAL:
+        return clients_by_role["surgeon"] | clients_by_role["nurse"] | clients_by_role["trainee"]
+    return clients_by_role["nurse"] | clients_by_role["trainee"]
+
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """Serialize a WebSocket message to JSON text (orjson when installed)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+    return json.dumps(message)
+
+
+async def send_message(websocket: WebSocket, message: Dict[str, Any]):
+    """Send a message as a JSON text frame (the frontend JSON.parses text frames)."""
+    await websocket.send_text(encode_message(message))
+
+
+# (frame_id, serialized frame message) shared by all clients
+_frame_payload_cache: tuple = (0, "")
+
+
+def frame_payload(frame: CapturedFrame) -> str:
+    """Serialized 'frame' message for a captured frame, built once per frame."""
+    global _frame_payload_cache
+    frame_id, payload = _frame_payload_cache
+    if frame_id != frame.frame_id:
+        payload = encode_message({
+            "type": "frame",
+            "data": {
+                "frame_id": frame.frame_id,
+                "frame": "data:image/jpeg;base64," + frame.encode_to_base64(),
+                "width": frame.width,
+                "height": frame.height,
+                "timestamp": frame.timestamp.isoformat()
+            }
+        })
+        _frame_payload_cache = (frame.frame_id, payload)
+    return payload
+
 
 # Pydantic models
 class StatusResponse(BaseModel):
@@ -120,12 +205,20 @@ startup_time = time.time()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifecycle management."""
-    global voice_service
+    global voice_service, camera_service
 
     print("\n" + "=" * 50)
     print("ARIA - Surgical Command Center Starting...")
     print("=" * 50)
 
+    # Start the shared capture pipeline (one capture/encode for all clients)
+    camera_service = get_camera_service()
+    if camera_service.start():
+        print(f"Camera: {camera_service.source_type.value} @ {camera_service.resolution}")
+    else:
+        print("Camera: failed to start")
+        camera_service = None
+
     # Initialize voice service
     if VOICE_ENABLED:
         try:
@@ -155,6 +248,8 @@ async def lifespan(app: FastAPI):
     yield
 
     # Cleanup
+    if camera_service:
+        camera_service.stop()
     if voice_service:
         voice_service.stop()
     print("\n[Shutdown] ARIA shutting down. Goodbye!")
@@ -164,7 +259,8 @@ app = FastAPI(
     title="ARIA - Surgical Command Center",
     description="Real-time AI-powered neurosurgical monitoring backend",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
 )
 
 app.add_middleware(
@@ -191,7 +287,7 @@ async def get_status():
     """Get comprehensive system status."""
     return StatusResponse(
         uptime_seconds=time.time() - startup_time,
-        camera_status="synthetic",
+        camera_status=camera_service.source_type.value if camera_service else "unavailable",
         analysis_status="active",
         voice_status="active" if VOICE_ENABLED else "disabled",
         connected_clients=len(connected_clients),
@@ -203,7 +299,7 @@ async def get_status():
             "role_switching": True,
             "training_mode": True
         }
-    )
+    ).model_dump()
 
 
 @app.get("/api/roles")
@@ -252,13 +348,15 @@ async def trigger_alert(request: AlertRequest):
         else:
             voice_service.queue_alert(request.message, voice_priority)
 
-    # Send to connected clients
-    for client in connected_clients.values():
-        if client.should_receive_alert(priority):
-            try:
-                await client.websocket.send_json(alert_message)
-            except:
-                pass
+    # Send to connected clients: serialize once, send concurrently
+    payload = encode_message(alert_message)
+    await asyncio.gather(
+        *(
+            client.websocket.send_text(payload)
+            for client in alert_recipients(priority)
+        ),
+        return_exceptions=True
+    )
 
     return {"status": "sent", "recipients": len(connected_clients), "voice": request.speak and voice_service is not None}
 
@@ -318,6 +416,7 @@ async def websocket_endpoint(websocket: WebSocket):
     client_id = f"client_{int(time.time() * 1000)}"
     client = ClientConnection(websocket, client_id)
     connected_clients[client_id] = client
+    _update_client_bucket(client)
 
     print(f"[WS] Client {client_id} connected (total: {len(connected_clients)})")
 
@@ -330,9 +429,12 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         streaming_task = asyncio.create_task(stream_data(client))
         receive_task = asyncio.create_task(receive_messages(client))
+        tasks = [streaming_task, receive_task]
+        if camera_service:
+            tasks.append(asyncio.create_task(stream_video(client)))
 
         done, pending = await asyncio.wait(
-            [streaming_task, receive_task],
+            tasks,
             return_when=asyncio.FIRST_COMPLETED
         )
 
@@ -346,6 +448,7 @@ async def websocket_endpoint(websocket: WebSocket):
     finally:
         if client_id in connected_clients:
             del connected_clients[client_id]
+        clients_by_role[client.role].discard(client)
 
 
 async def stream_data(client: ClientConnection):
@@ -353,57 +456,74 @@ async def stream_data(client: ClientConnection):
     phases = ["preparation", "approach", "resection", "hemostasis", "closure"]
     phase_idx = 0
 
+    # Message skeleton built once per session; only the changing fields are rewritten
+    structures = [
+        {"name": "tumor_margin", "proximity_mm": 0.0, "status": "visible"},
+        {"name": "vessel", "proximity_mm": 0.0, "status": "mapped"},
+        {"name": "motor_cortex", "proximity_mm": 0.0, "status": "protected"}
+    ]
+    instruments = [
+        {"name": "bipolar", "status": "ready"},
+        {"name": "suction", "status": "ready"},
+        {"name": "microscope", "status": "active"}
+    ]
+    trajectory = {
+        "entry": [0, 0, 50],
+        "target": [30, 20, 80],
+        "depth_mm": 0.0,
+        "status": "on_trajectory"
+    }
+    analysis_message = {
+        "type": "analysis",
+        "safety_score": 0,
+        "phase": phases[0],
+        "phase_number": 1,
+        "total_phases": len(phases),
+        "structures": structures,
+        "instruments": instruments,
+        "trajectory": trajectory,
+        "timestamp": ""
+    }
+
     while True:
         try:
-            # Synthetic analysis data
-            safety_score = random.randint(75, 98)
-            
-            analysis_message = {
-                "type": "analysis",
-                "safety_score": safety_score,
-                "phase": phases[phase_idx % len(phases)],
-                "phase_number": (phase_idx % len(phases)) + 1,
-                "total_phases": len(phases),
-                "structures": [
-                    {"name": "tumor_margin", "proximity_mm": round(random.uniform(2, 10), 1), "status": "visible"},
-                    {"name": "vessel", "proximity_mm": round(random.uniform(3, 15), 1), "status": "mapped"},
-                    {"name": "motor_cortex", "proximity_mm": round(random.uniform(5, 20), 1), "status": "protected"}
-                ],
-                "instruments": [
-                    {"name": "bipolar", "status": random.choice(["in_use", "ready"])},
-                    {"name": "suction", "status": random.choice(["in_use", "ready"])},
-                    {"name": "microscope", "status": "active"}
-                ],
-                "trajectory": {
-                    "entry": [0, 0, 50],
-                    "target": [30, 20, 80],
-                    "depth_mm": round(random.uniform(20, 35), 1),
-                    "status": "on_trajectory"
-                },
-                "timestamp": datetime.now().isoformat()
-            }
+            now_iso = datetime.now().isoformat()
 
-            await client.websocket.send_json(analysis_message)
+            # Synthetic analysis data
+            structures[0]["proximity_mm"] = client.uniform_tenths(2, 10)
+            structures[1]["proximity_mm"] = client.uniform_tenths(3, 15)
+            structures[2]["proximity_mm"] = client.uniform_tenths(5, 20)
+            instruments[0]["status"] = "in_use" if client.random() < 0.5 else "ready"
+            instruments[1]["status"] = "in_use" if client.random() < 0.5 else "ready"
+            trajectory["depth_mm"] = client.uniform_tenths(20, 35)
+            analysis_message.update(
+                safety_score=75 + int(client.random() * 24),
+                phase=phases[phase_idx % len(phases)],
+                phase_number=(phase_idx % len(phases)) + 1,
+                timestamp=now_iso
+            )
+
+            await send_message(client.websocket, analysis_message)
 
             # Random alerts with voice
-            if random.random() > 0.95:
-                vessel_proximity = round(random.uniform(2, 5), 1)
+            if client.random() > 0.95:
+                vessel_proximity = client.uniform_tenths(2, 5)
                 alert_text = f"Vessel proximity: {vessel_proximity} millimeters"
                 alert_message = {
                     "type": "alert",
                     "priority": "warning",
                     "message": alert_text,
                     "speak": True,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": now_iso
                 }
                 if client.should_receive_alert(AlertPriority.WARNING):
-                    await client.websocket.send_json(alert_message)
+                    await send_message(client.websocket, alert_message)
                     # Trigger voice alert
                     if voice_service and not client.muted:
                         voice_service.queue_alert(alert_text, VoicePriority.WARNING)
 
             # Occasionally advance phase
-            if random.random() > 0.99:
+            if client.random() > 0.99:
                 phase_idx += 1
 
             await asyncio.sleep(0.5)
@@ -416,6 +536,24 @@ async def stream_data(client: ClientConnection):
             await asyncio.sleep(0.1)
 
 
+async def stream_video(client: ClientConnection):
+    """Stream camera frames to client from the shared capture pipeline."""
+    last_frame_id = 0
+    while True:
+        try:
+            frame = await camera_service.wait_for_frame(last_frame_id)
+            last_frame_id = frame.frame_id
+            await client.websocket.send_text(frame_payload(frame))
+        except asyncio.CancelledError:
+            break
+        except WebSocketDisconnect:
+            break
+        except Exception as e:
+            if DEBUG_MODE:
+                print(f"[Video] Error: {e}")
+            await asyncio.sleep(0.1)
+
+
 async def receive_messages(client: ClientConnection):
     """Receive messages from client."""
     while True:
@@ -428,12 +566,12 @@ async def receive_messages(client: ClientConnection):
             if message_type == "set_role":
                 role = payload.get("role", "surgeon")
                 if role in ["surgeon", "nurse", "trainee"]:
-                    client.role = role
+                    _update_client_bucket(client, role=role)
                     await client.websocket.send_json({"type": "role_changed", "role": role})
                     print(f"[WS] Client {client.client_id} role -> {role}")
 
             elif message_type in ("mute_voice", "set_mute"):
-                client.muted = payload.get("muted", False)
+                _update_client_bucket(client, muted=payload.get("muted", False))
                 # Also update global voice service
                 if voice_service:
                     if client.muted:
@@ -460,5 +598,15 @@ async def receive_messages(client: ClientConnection):
 
 
 if __name__ == "__main__":
+    import importlib.util
     import uvicorn
-    uvicorn.run("main:app", host=BACKEND_HOST, port=BACKEND_PORT, reload=DEBUG_MODE)
+
+    # uvloop/httptools ship with uvicorn[standard]; fall back where unavailable (e.g. Windows)
+    uvicorn.run(
+        "main:app",
+        host=BACKEND_HOST,
+        port=BACKEND_PORT,
+        reload=DEBUG_MODE,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+    )
@@ -0,0 +1,318 @@
+"""
+Tests for the ARIA Analysis Service
+
+Run with:
+    pytest dashboard/backend/test_analysis_service.py -v
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from analysis_service import AnalysisService, AnalysisType, NEUROVISION_AVAILABLE
+
+if NEUROVISION_AVAILABLE:
+    from src.vision import AnalysisMode, ClaudeVisionAnalyzer
+
+pytestmark = pytest.mark.skipif(not NEUROVISION_AVAILABLE, reason="NeuroVision modules not available")
+
+
+def make_frame(blood: bool = False) -> np.ndarray:
+    """Uniform tissue frame, optionally with an ~80 px dark blood region."""
+    frame = np.full((720, 1280, 3), 150, dtype=np.uint8)
+    if blood:
+        frame[300:380, 600:680] = 40
+    return frame
+
+
+def analyze(service: AnalysisService, frame: np.ndarray, frame_id: int = 1):
+    return asyncio.run(
+        service.analyze_frame(frame, frame_id, analysis_type=AnalysisType.SEGMENTATION_ONLY)
+    )
+
+
+def structure_names(result) -> set:
+    return {s.name for s in result.structures}
+
+
+class TestSegmentationCache:
+    """Tests for the identical-frame segmentation cache."""
+
+    @pytest.fixture
+    def service(self):
+        return AnalysisService(modality="OR_CAMERA", cache_identical_frames=True)
+
+    def test_disabled_by_default(self, monkeypatch):
+        """Test frames aren't hashed or cached unless the source can repeat them."""
+        import analysis_service
+
+        def fail_frame_key(frame):
+            raise AssertionError("frame hashed with the cache disabled")
+
+        monkeypatch.setattr(analysis_service, "_frame_key", fail_frame_key)
+        service = AnalysisService(modality="OR_CAMERA")
+        frame = make_frame(blood=True)
+        analyze(service, frame)
+        result = analyze(service, frame, frame_id=2)
+
+        assert service.get_status()["segmentation_cache_hits"] == 0
+        assert "blood" in structure_names(result)
+
+    def test_identical_frame_hits(self, service):
+        """Test the same pixels reuse the cached segmentation."""
+        frame = make_frame(blood=True)
+        first = analyze(service, frame)
+        second = analyze(service, frame.copy(), frame_id=2)
+
+        assert service.get_status()["segmentation_cache_hits"] == 1
+        assert structure_names(second) == structure_names(first)
+
+    def test_small_region_change_misses(self, service):
+        """Test a small new blood region is segmented, not served from cache."""
+        analyze(service, make_frame())
+        result = analyze(service, make_frame(blood=True), frame_id=2)
+
+        assert service.get_status()["segmentation_cache_hits"] == 0
+        assert "blood" in structure_names(result)
+
+    def test_shape_and_dtype_are_part_of_key(self, service):
+        """Test frames with the same bytes but different layout don't collide."""
+        frame = make_frame()
+        analyze(service, frame)
+        analyze(service, frame.reshape(1280, 720, 3), frame_id=2)
+
+        assert service.get_status()["segmentation_cache_hits"] == 0
+
+    def test_entry_expires_after_max_age(self, service):
+        """Test a static scene is re-segmented once the entry is too old."""
+        service.HASH_CACHE_MAX_AGE_SECONDS = 0.0
+        frame = make_frame()
+        analyze(service, frame)
+        analyze(service, frame, frame_id=2)
+
+        assert service.get_status()["segmentation_cache_hits"] == 0
+
+    def test_entry_expires_after_max_hits(self, service):
+        """Test an entry is only reused HASH_CACHE_MAX_HITS times."""
+        service.HASH_CACHE_MAX_HITS = 2
+        frame = make_frame()
+        for frame_id in range(5):
+            analyze(service, frame, frame_id)
+
+        # store, hit, hit, expire + re-store, hit
+        assert service.get_status()["segmentation_cache_hits"] == 3
+
+
+class TestConcurrentSegmentation:
+    """Tests that concurrent frames don't share segmenter scratch buffers."""
+
+    def test_concurrent_masks_match_serial(self):
+        """Test masks from concurrent analyze_frame calls match a serial run."""
+        service = AnalysisService(modality="OR_CAMERA")
+
+        frames = []
+        for i in range(8):
+            frame = make_frame()
+            frame[100 + 60 * i:180 + 60 * i, 80 + 140 * i:160 + 140 * i] = 40
+            frames.append(frame)
+        expected = [service.segmenter.segment_all(frame) for frame in frames]
+
+        async def analyze_all():
+            return await asyncio.gather(*(
+                service.analyze_frame(frame, i, analysis_type=AnalysisType.SEGMENTATION_ONLY)
+                for i, frame in enumerate(frames)
+            ))
+
+        for _ in range(5):
+            for result, masks in zip(asyncio.run(analyze_all()), expected):
+                for name, mask in masks.items():
+                    assert np.array_equal(result.segmentation_masks.raw(name), mask)
+
+    def test_preprocess_returns_fresh_images(self):
+        """Test preprocess() output isn't overwritten by later frames."""
+        service = AnalysisService(modality="OR_CAMERA")
+        gray, blurred = service.segmenter.preprocess(make_frame())
+        gray_copy, blurred_copy = gray.copy(), blurred.copy()
+
+        service.segmenter.preprocess(make_frame(blood=True))
+        service.segmenter.segment_all(make_frame(blood=True))
+
+        assert np.array_equal(gray, gray_copy)
+        assert np.array_equal(blurred, blurred_copy)
+
+
+class FakeClaudeAnalyzer:
+    """Records batch sizes and answers immediately."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def analyze_frames_batch(self, frames, mode):
+        self.batches.append(len(frames))
+        return [{"safety_score": 90} for _ in frames]
+
+
+class TestClaudeBatching:
+    """Tests for Claude request micro-batching."""
+
+    @pytest.fixture
+    def service(self):
+        service = AnalysisService(modality="OR_CAMERA")
+        service.claude_analyzer = FakeClaudeAnalyzer()
+        service.CLAUDE_BATCH_WINDOW_SECONDS = 1.0
+        return service
+
+    def test_single_frame_is_not_delayed(self, service):
+        """Test a lone request is dispatched without waiting out the window."""
+        async def submit_one():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            result = await service._submit_claude(1, make_frame(), None)
+            return result, loop.time() - start
+
+        result, elapsed = asyncio.run(submit_one())
+
+        assert result == {"safety_score": 90}
+        assert elapsed < 0.5
+        assert service.claude_analyzer.batches == [1]
+
+    def test_concurrent_frames_are_batched(self, service):
+        """Test frames queued together go out in one call."""
+        async def submit_many():
+            frame = make_frame()
+            return await asyncio.gather(
+                *(service._submit_claude(i, frame, None) for i in range(3))
+            )
+
+        results = asyncio.run(submit_many())
+
+        assert len(results) == 3
+        assert sum(service.claude_analyzer.batches) == 3
+        assert len(service.claude_analyzer.batches) < 3
+
+
+class BlockingMessages:
+    """Synchronous messages API that takes a while to answer, like the real client."""
+
+    def create(self, model, max_tokens, messages):
+        time.sleep(0.3)
+        images = sum(1 for part in messages[0]["content"] if part["type"] == "image")
+        text = json.dumps([{"safety_score": 90}] * images if images > 1 else {"safety_score": 90})
+        return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+
+class TestClaudeRequestsDontBlock:
+    """Tests that Claude API round trips run off the event loop."""
+
+    @pytest.fixture
+    def analyzer(self):
+        # Bypass __init__, which needs the anthropic package and an API key
+        analyzer = ClaudeVisionAnalyzer.__new__(ClaudeVisionAnalyzer)
+        analyzer.client = SimpleNamespace(messages=BlockingMessages())
+        analyzer.model = "test-model"
+        analyzer.prompts = analyzer._build_prompts()
+        return analyzer
+
+    @pytest.mark.parametrize("frame_count", [1, 3])
+    def test_event_loop_keeps_running(self, analyzer, frame_count):
+        """Test other coroutines keep running while a request is in flight."""
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            frames = [make_frame()] * frame_count
+            results = await analyzer.analyze_frames_batch(frames, AnalysisMode.FULL)
+            task.cancel()
+            return results, ticks
+
+        results, ticks = asyncio.run(run())
+
+        assert results == [{"safety_score": 90}] * frame_count
+        assert ticks >= 10
+
+
+class FrameRecordingAnalyzer:
+    """Records the frames it is handed, after yielding to other coroutines."""
+
+    def __init__(self):
+        self.frames = []
+
+    async def analyze_frames_batch(self, frames, mode):
+        await asyncio.sleep(0)
+        self.frames.extend(frame.copy() for frame in frames)
+        return [{"safety_score": 90} for _ in frames]
+
+
+class TestClaudeFrameOwnership:
+    """Tests that queued Claude frames don't alias the caller's buffer."""
+
+    def test_reused_buffer_does_not_change_queued_frame(self):
+        """Test overwriting a pooled frame after submission doesn't alter the queued one."""
+        service = AnalysisService(modality="OR_CAMERA")
+        service.claude_analyzer = FrameRecordingAnalyzer()
+
+        async def submit_then_overwrite():
+            frame = make_frame()
+            task = asyncio.create_task(service._submit_claude(1, frame, None))
+            await asyncio.sleep(0)
+            frame[:] = 0  # The camera ring reuses the buffer
+            return await task
+
+        asyncio.run(submit_then_overwrite())
+
+        assert np.all(service.claude_analyzer.frames[0] == 150)
+
+
+class TestSegmentationErrors:
+    """Tests that segmentation failures degrade instead of raising."""
+
+    @pytest.fixture
+    def service(self):
+        return AnalysisService(modality="OR_CAMERA")
+
+    def test_segmenter_exception_returns_empty_result(self, service):
+        """Test an exception inside segment_all is logged, not propagated."""
+        def failing_segment_all(frame):
+            raise RuntimeError("boom")
+
+        service._segment_all = failing_segment_all
+        result = analyze(service, make_frame(blood=True))
+
+        assert result.structures == []
+        assert result.segmentation_masks is None
+
+    def test_invalid_frame_returns_empty_result(self, service):
+        """Test a malformed frame doesn't raise out of analyze_frame."""
+        result = analyze(service, np.zeros((0, 0, 3), dtype=np.uint8))
+
+        assert result.structures == []
+
+
+class TestResultSerialization:
+    """Tests for the AnalysisResult wire format consumed by the frontend."""
+
+    def test_structures_serialize_as_objects(self):
+        """Test each structure is its own object in to_dict()/to_json()."""
+        service = AnalysisService(modality="OR_CAMERA")
+        result = analyze(service, make_frame(blood=True))
+        payload = json.loads(result.to_json())
+
+        assert isinstance(payload["structures"], list)
+        assert len(payload["structures"]) == len(result.structures)
+        blood = next(s for s in payload["structures"] if s["name"] == "blood")
+        assert set(blood) >= {"name", "type", "centroid", "bounding_box", "area", "is_critical"}
+        assert blood["is_critical"] is True
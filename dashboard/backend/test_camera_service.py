@@ -0,0 +1,71 @@
+"""
+Tests for the ARIA Camera Service
+
+Run with:
+    pytest dashboard/backend/test_camera_service.py -v
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from camera_service import CameraService, CameraSourceType, CapturedFrame
+
+
+def capture(camera: CameraService, frame_id: int) -> int:
+    """Run one producer step the way the capture loops do; returns the slot used."""
+    slot = camera._claim_slot()
+    frame = camera._frame_pool[slot]
+    if frame is None:
+        frame = camera._frame_pool[slot] = np.empty((4, 4, 3), np.uint8)
+    frame.fill(frame_id % 256)
+    camera._publish(CapturedFrame(
+        frame_id=frame_id,
+        timestamp=datetime.now(),
+        raw_frame=frame,
+        width=4,
+        height=4
+    ))
+    return slot
+
+
+class TestFrameRing:
+    """Tests for the pooled frame ring buffer."""
+
+    @pytest.fixture
+    def camera(self):
+        return CameraService(source_type=CameraSourceType.SYNTHETIC)
+
+    def test_frames_come_out_in_order(self, camera):
+        """Test get_frame() returns frames oldest first."""
+        for frame_id in range(1, 4):
+            capture(camera, frame_id)
+
+        assert [camera.get_frame(0).frame_id for _ in range(3)] == [1, 2, 3]
+        assert camera.get_frame(0) is None
+
+    def test_full_ring_drops_slot_before_reuse(self, camera):
+        """Test the oldest unread frame leaves the queue before its buffer is overwritten."""
+        for frame_id in range(1, camera.QUEUE_MAX_SIZE + 1):
+            capture(camera, frame_id)
+
+        # Producer claims the slot holding frame 1, but hasn't decoded into it yet
+        camera._claim_slot()
+
+        frame = camera.get_frame(0)
+        assert frame.frame_id == 2
+        assert camera.dropped_frames == 1
+
+    def test_unread_frames_are_intact_after_overflow(self, camera):
+        """Test every frame get_frame() returns still holds its own pixels."""
+        for frame_id in range(1, camera.QUEUE_MAX_SIZE + 10):
+            capture(camera, frame_id)
+
+        while (frame := camera.get_frame(0)) is not None:
+            assert np.all(frame.raw_frame == frame.frame_id % 256)
+        assert camera.dropped_frames == 9
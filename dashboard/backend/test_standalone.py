@@ -80,8 +80,7 @@ async def test_analysis():
     import numpy as np
 
     # Create synthetic frame
-    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
-    frame[:, :] = (30, 20, 60)  # Dark surgical background
+    frame = np.full((720, 1280, 3), (30, 20, 60), dtype=np.uint8)  # Dark surgical background
 
     # Add some structures
     import cv2
@@ -149,7 +148,7 @@ def test_voice():
     print("\nTesting alert queue...")
     voice.queue_alert("Testing info alert", AlertPriority.INFO)
     voice.queue_alert("Testing warning alert", AlertPriority.WARNING)
-    print(f"  Queue size: {voice.alert_queue.qsize()}")
+    print(f"  Queue size: {voice.get_status()['queue_size']}")
 
     # Test throttling
     print("\nTesting throttling...")
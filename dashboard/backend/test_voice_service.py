@@ -0,0 +1,352 @@
+"""
+Tests for the ARIA Voice Service
+
+Run with:
+    pytest dashboard/backend/test_voice_service.py -v
+"""
+
+import heapq
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from voice_service import AlertPriority, VoiceService, _AudioClip, _normalize_alert_text
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """Voice service with no TTS backends and a temporary disk cache."""
+    monkeypatch.setattr(VoiceService, "CACHE_DIR", tmp_path)
+    return VoiceService(enable_fallback=False)
+
+
+class TestAlertNormalization:
+    """Tests for alert text normalization and the keys derived from it."""
+
+    @pytest.mark.parametrize("a, b", [
+        ("Vessel proximity: 2.5 millimeters", "Vessel proximity: 25 millimeters"),
+        ("Depth 8.5", "Depth 85"),
+        ("Offset -3 degrees", "Offset 3 degrees"),
+    ])
+    def test_numbers_stay_distinct(self, service, a, b):
+        """Test decimal points and signs are not folded away."""
+        assert _normalize_alert_text(a) != _normalize_alert_text(b)
+        assert service._hash_alert(a) != service._hash_alert(b)
+
+    @pytest.mark.parametrize("a, b", [
+        ("Critical: Vessel proximity warning!", "critical: vessel proximity warning"),
+        ("Adjust  depth.", "adjust depth"),
+        ("  Safety score: 80 ", "safety score: 80"),
+    ])
+    def test_case_spacing_and_trailing_punctuation_fold(self, service, a, b):
+        """Test cosmetic differences map to the same key."""
+        assert _normalize_alert_text(a) == _normalize_alert_text(b)
+        assert service._hash_alert(a) == service._hash_alert(b)
+
+    def test_distinct_numbers_are_not_throttled(self, service):
+        """Test alerts differing only in a number are both queued."""
+        assert service.queue_alert("Vessel proximity: 2.5 millimeters", AlertPriority.WARNING)
+        assert service.queue_alert("Vessel proximity: 25 millimeters", AlertPriority.WARNING)
+
+    def test_repeat_is_throttled(self, service):
+        """Test the same alert within the throttle window is dropped."""
+        assert service.queue_alert("Vessel proximity: 2.5 millimeters", AlertPriority.WARNING)
+        assert not service.queue_alert("vessel proximity: 2.5 millimeters.", AlertPriority.WARNING)
+
+    def test_disk_cache_is_versioned(self, service):
+        """Test the disk cache directory carries the cache key version."""
+        assert service._disk_cache_dir.name.startswith(f"v{VoiceService.DISK_CACHE_VERSION}_")
+        service.set_voice("other_voice")
+        assert service._disk_cache_dir.name.startswith(f"v{VoiceService.DISK_CACHE_VERSION}_other_voice")
+
+
+def drain(service):
+    """Pop queued alert texts in the order the worker would dispatch them."""
+    heap = list(service._alert_heap)
+    return [heapq.heappop(heap)[2].text for _ in range(len(heap))]
+
+
+class TestAlertQueue:
+    """Tests for alert heap ordering and stale-alert handling."""
+
+    def test_priority_order(self, service):
+        """Test higher-priority alerts are dispatched first."""
+        service.queue_alert("Info update", AlertPriority.INFO)
+        service.queue_alert("Warning update", AlertPriority.WARNING)
+        service.queue_alert("Critical update", AlertPriority.CRITICAL)
+        service.queue_alert("Navigation update", AlertPriority.NAVIGATION)
+
+        assert drain(service) == ["Critical update", "Warning update", "Navigation update", "Info update"]
+
+    def test_fifo_within_priority(self, service):
+        """Test alerts of equal priority keep their queueing order."""
+        for i in range(5):
+            service.queue_alert(f"Warning {i}", AlertPriority.WARNING)
+
+        assert drain(service) == [f"Warning {i}" for i in range(5)]
+
+    def test_old_alerts_are_stale(self, service):
+        """Test non-critical alerts expire after MAX_ALERT_AGE_SECONDS."""
+        service.queue_alert("Info update", AlertPriority.INFO)
+        service.queue_alert("Critical update", AlertPriority.CRITICAL)
+        info = next(e[2] for e in service._alert_heap if e[2].priority == AlertPriority.INFO)
+        critical = next(e[2] for e in service._alert_heap if e[2].priority == AlertPriority.CRITICAL)
+        later = time.monotonic() + service.MAX_ALERT_AGE_SECONDS[AlertPriority.INFO] + 1.0
+
+        assert not service._is_stale(info, time.monotonic())
+        assert service._is_stale(info, later)
+        assert not service._is_stale(critical, later + 3600)
+
+    def test_superseded_by_critical_alerts(self, service):
+        """Test a non-critical alert goes stale once two later CRITICALs are queued."""
+        service.queue_alert("Warning update", AlertPriority.WARNING)
+        warning = service._alert_heap[0][2]
+        now = time.monotonic()
+
+        service.queue_alert("Critical one", AlertPriority.CRITICAL)
+        assert not service._is_stale(warning, now)
+
+        service.queue_alert("Critical two", AlertPriority.CRITICAL)
+        assert service._is_stale(warning, now)
+
+    def test_full_queue_prunes_stale_alerts(self, service):
+        """Test a full queue makes room by dropping stale alerts, not fresh ones."""
+        for i in range(service.MAX_QUEUE_SIZE):
+            service.queue_alert(f"Info {i}", AlertPriority.INFO)
+        assert not service.queue_alert("Warning update", AlertPriority.WARNING)
+
+        for _, _, alert in service._alert_heap:
+            alert.timestamp -= service.MAX_ALERT_AGE_SECONDS[AlertPriority.INFO] + 1.0
+        assert service.queue_alert("Warning update", AlertPriority.WARNING)
+        assert drain(service) == ["Warning update"]
+
+
+class FakeTTSEngine:
+    """pyttsx3 stand-in: each utterance finishes after a few iterate() calls."""
+
+    def __init__(self, iterations: int = 3):
+        self.iterations = iterations
+        self.spoken = []
+        self.completed = []
+        self.stopped = []
+        self.before_finish = None  # Called once, just before the next utterance finishes
+        self._callback = None
+        self._current = None
+        self._remaining = 0
+
+    def connect(self, topic, callback):
+        self._callback = callback
+
+    def startLoop(self, use_driver_loop):
+        pass
+
+    def endLoop(self):
+        pass
+
+    def say(self, text, name=None):
+        self.spoken.append(text)
+        self._current = (text, name)
+        self._remaining = self.iterations
+
+    def stop(self):
+        if self._current is not None:
+            self.stopped.append(self._current[0])
+            self._current = None
+
+    def iterate(self):
+        if self._current is None:
+            return
+        self._remaining -= 1
+        if self._remaining > 0:
+            return
+        if self.before_finish is not None:
+            hook, self.before_finish = self.before_finish, None
+            hook()
+        text, name = self._current
+        self._current = None
+        self.completed.append(text)
+        self._callback(name, True)
+
+
+class TestSpeechPreemption:
+    """Tests for cutting off pyttsx3 speech when a CRITICAL alert arrives."""
+
+    @pytest.fixture
+    def tts_service(self, service):
+        service.tts_engine = FakeTTSEngine()
+        service._running = True
+        service._tts_thread = threading.Thread(target=service._tts_loop, daemon=True)
+        service._tts_thread.start()
+        yield service
+        service._running = False
+        service._tts_thread.join(timeout=2.0)
+
+    def test_preempt_stops_current_utterance(self, tts_service):
+        """Test a preemption while speaking cuts that utterance off."""
+        engine = tts_service.tts_engine
+        engine.iterations = 1000
+        speaker = threading.Thread(target=tts_service._speak_pyttsx3, args=("Info update",))
+        speaker.start()
+        while tts_service._tts_speaking is None:
+            time.sleep(0.01)
+
+        tts_service._preempt_speech()
+        speaker.join(timeout=2.0)
+
+        assert not speaker.is_alive()
+        assert engine.stopped == ["Info update"]
+
+    def test_finish_before_preempt_does_not_cut_next_alert(self, tts_service):
+        """Test a preemption that loses the race with the end of its utterance is dropped."""
+        engine = tts_service.tts_engine
+        # The CRITICAL alert's preemption lands just before the info utterance ends
+        engine.before_finish = tts_service._preempt_speech
+
+        tts_service._speak_pyttsx3("Info update")
+        tts_service._speak_pyttsx3("Critical update")
+
+        assert engine.stopped == []
+        assert engine.completed == ["Info update", "Critical update"]
+
+
+class FakeStreamResponse:
+    def __init__(self, chunks, error):
+        self._chunks = chunks
+        self._error = error
+
+    def raise_for_status(self):
+        pass
+
+    def iter_bytes(self, chunk_size):
+        yield from self._chunks
+        if self._error is not None:
+            raise self._error
+
+
+class FakeElevenLabsClient:
+    """httpx client stand-in whose TTS stream can fail after some chunks."""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+
+    @contextmanager
+    def stream(self, method, url, **kwargs):
+        yield FakeStreamResponse(self.chunks, self.error)
+
+
+class TestStreamFailure:
+    """Tests that an ElevenLabs stream failing partway never plays a truncated alert."""
+
+    TEXT = "Critical: Vessel proximity warning"
+    CHUNKS = [b"\x01" * 8, b"\x02" * 8]
+
+    @pytest.fixture
+    def recorded(self, service):
+        """Service with fake output and fallback that record what was played or spoken."""
+        played, spoken = [], []
+        service._create_disk_cache_dir()  # Done by start()
+        service._audio_stream = object()
+        service.tts_engine = object()
+        service._play_audio_data = played.append
+        service._write_pcm = played.extend  # Records each chunk as it is written
+        service._speak_pyttsx3 = lambda text: spoken.append(text) or True
+        return service, played, spoken
+
+    def play_queued(self, service):
+        clip = _AudioClip()
+        service._synthesize(self.TEXT, False, clip)
+        first_chunk = service._await_first_chunk(AlertPriority.WARNING, clip)
+        service._play_clip(self.TEXT, first_chunk, clip)
+
+    def test_queued_failure_falls_back_to_full_text(self, recorded):
+        """Test a queued alert whose stream fails midway is spoken in full by pyttsx3."""
+        service, played, spoken = recorded
+        service.elevenlabs_client = FakeElevenLabsClient(self.CHUNKS, ConnectionError("read timeout"))
+
+        self.play_queued(service)
+
+        assert played == []
+        assert spoken == [self.TEXT]
+
+    def test_queued_success_plays_whole_clip(self, recorded):
+        """Test a queued alert whose stream completes is played once, in full."""
+        service, played, spoken = recorded
+        service.elevenlabs_client = FakeElevenLabsClient(self.CHUNKS)
+
+        self.play_queued(service)
+
+        assert played == [b"".join(self.CHUNKS)]
+        assert spoken == []
+
+    def test_direct_failure_falls_back_once(self, recorded):
+        """Test speak_immediate plays nothing from a failed stream before falling back."""
+        service, played, spoken = recorded
+        service.elevenlabs_client = FakeElevenLabsClient(self.CHUNKS, ConnectionError("read timeout"))
+
+        assert service.speak_immediate(self.TEXT)
+
+        assert played == []
+        assert spoken == [self.TEXT]
+
+    def test_failed_stream_is_not_cached(self, recorded):
+        """Test a partial clip is never written to the caches."""
+        service, _, _ = recorded
+        service.elevenlabs_client = FakeElevenLabsClient(self.CHUNKS, ConnectionError("read timeout"))
+
+        service.speak_immediate(self.TEXT)
+
+        assert service._load_cached_audio(service._hash_alert(self.TEXT)) is None
+        assert not list(service._disk_cache_dir.glob("*"))
+
+
+class TestDiskCache:
+    """Tests for the on-disk audio cache bookkeeping."""
+
+    def test_directory_created_on_start_and_voice_change(self, service):
+        """Test the cache directory exists once the service starts or changes voice."""
+        assert not service._disk_cache_dir.exists()
+
+        service.start()
+        try:
+            assert service._disk_cache_dir.is_dir()
+            service.set_voice("other_voice")
+            assert service._disk_cache_dir.is_dir()
+        finally:
+            service.stop()
+
+    def test_synthesis_does_not_probe_directory(self, service, monkeypatch):
+        """Test generating audio doesn't mkdir the cache directory each time."""
+        service._create_disk_cache_dir()
+        service.elevenlabs_client = FakeElevenLabsClient([b"\x01" * 8])
+        monkeypatch.setattr(type(service._disk_cache_dir), "mkdir", lambda *a, **kw: pytest.fail("mkdir called"))
+
+        list(service._generate_audio("Adjust depth", service._hash_alert("Adjust depth")))
+
+        assert service._load_cached_audio(service._hash_alert("Adjust depth")) == b"\x01" * 8
+
+    def test_concurrent_synthesis_keeps_total_exact(self, service):
+        """Test the running size matches the directory after concurrent syntheses."""
+        service._create_disk_cache_dir()
+        service.elevenlabs_client = FakeElevenLabsClient([b"\x01" * 64, b"\x02" * 64])
+        service._disk_cache_bytes = 0
+        texts = [f"Alert {i}" for i in range(64)]
+
+        def synthesize(text):
+            for _ in service._generate_audio(text, service._hash_alert(text)):
+                time.sleep(0)
+
+        threads = [threading.Thread(target=synthesize, args=(text,)) for text in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        on_disk = sum(path.stat().st_size for path in service._disk_cache_dir.glob("*.pcm"))
+        assert service._disk_cache_bytes == on_disk == 128 * len(texts)
@@ -11,30 +11,40 @@ Features:
 - pyttsx3 offline fallback for critical alerts
 - Priority queue (critical > warning > navigation > info)
 - Smart throttling (no repeats within 5 seconds)
-- Async audio playback
+- Streaming PCM playback (no temp files or player subprocesses)
 """
 
-import asyncio
 import time
 import os
-import tempfile
 import hashlib
-from queue import PriorityQueue
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+from queue import Empty, PriorityQueue, SimpleQueue
 from datetime import datetime
+from pathlib import Path
 from typing import Optional, Dict, Any, List
 from dataclasses import dataclass, field
 from enum import IntEnum
 import threading
 
+import numpy as np
+
 
 # Voice library imports with fallbacks
 try:
-    from elevenlabs import ElevenLabs
-    from elevenlabs.core import ApiError
+    import httpx  # ElevenLabs REST API is called directly
     ELEVENLABS_AVAILABLE = True
 except ImportError:
     ELEVENLABS_AVAILABLE = False
-    print("[VoiceService] Warning: ElevenLabs not available")
+    print("[VoiceService] Warning: ElevenLabs not available (httpx missing)")
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 try:
     import pyttsx3
@@ -43,6 +53,13 @@ except ImportError:
     PYTTSX3_AVAILABLE = False
     print("[VoiceService] Warning: pyttsx3 not available")
 
+try:
+    import sounddevice
+    SOUNDDEVICE_AVAILABLE = True
+except (ImportError, OSError):  # OSError: PortAudio library missing
+    SOUNDDEVICE_AVAILABLE = False
+    print("[VoiceService] Warning: sounddevice not available")
+
 
 class AlertPriority(IntEnum):
     """Alert priority levels (lower = higher priority)."""
@@ -52,14 +69,58 @@ class AlertPriority(IntEnum):
     INFO = 4        # Informational updates
 
 
-@dataclass(order=True)
+# Sentence punctuation that doesn't change what is spoken when it ends an alert
+_TRAILING_PUNCTUATION = ".!?;:, "
+
+
+def _normalize_alert_text(text: str) -> str:
+    """
+    Canonical form of alert text: lowercase, single spaces, no trailing
+    sentence punctuation. Digits, decimal points and signs are kept, so
+    "2.5 mm" and "25 mm" stay distinct alerts.
+    """
+    return " ".join(text.lower().split()).rstrip(_TRAILING_PUNCTUATION)
+
+
+def _build_ulaw_table() -> np.ndarray:
+    """G.711 µ-law byte -> int16 sample lookup table."""
+    u = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (u >> 4) & 0x07
+    magnitude = ((((u & 0x0F) << 3) + 0x84) << exponent) - 0x84
+    return np.where(u & 0x80, -magnitude, magnitude).astype(np.int16)
+
+
+_ULAW_TO_LINEAR = _build_ulaw_table()
+
+
+def _ulaw_to_linear(data: bytes) -> np.ndarray:
+    """Expand 8-bit µ-law bytes to 16-bit linear PCM samples."""
+    return _ULAW_TO_LINEAR[np.frombuffer(data, dtype=np.uint8)]
+
+
+class _Preempted(Exception):
+    """Raised while waiting on a queued alert's audio when a CRITICAL alert must play first."""
+
+
+class _AudioClip:
+    """PCM for one queued alert: filled by a synthesis worker, drained by playback."""
+
+    def __init__(self):
+        self.chunks: "SimpleQueue[Optional[bytes]]" = SimpleQueue()  # None marks the end
+        self.head: Optional[bytes] = None  # First item, kept if playback is preempted
+        self.has_head = False
+        self.cancelled = False
+
+
+@dataclass
 class VoiceAlert:
-    """Voice alert with priority ordering."""
+    """Voice alert (queued by (priority, sequence number))."""
     priority: int
-    timestamp: float = field(compare=False)
-    text: str = field(compare=False)
-    alert_id: str = field(compare=False)
-    metadata: Dict[str, Any] = field(default_factory=dict, compare=False)
+    timestamp: float  # time.monotonic() when queued
+    text: str
+    alert_id: str
+    generation: int = 0  # CRITICAL alerts queued before this one
+    metadata: Dict[str, Any] = field(default_factory=dict)
 
 
 class VoiceService:
@@ -71,14 +132,39 @@ class VoiceService:
     """
 
     # ElevenLabs configuration
+    ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1"
     ELEVENLABS_TIMEOUT_MS = 300
+    STREAM_CHUNK_BYTES = 1024
     DEFAULT_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"  # Rachel voice
     DEFAULT_MODEL = "eleven_flash_v2_5"
 
+    # 8 kHz µ-law from ElevenLabs (1 byte/sample), expanded to 16-bit PCM on playback
+    OUTPUT_FORMAT = "ulaw_8000"
+    PCM_SAMPLE_RATE = 8000
+    OUTPUT_BLOCK_FRAMES = 160  # 20 ms PortAudio callback blocks
+
+    # On-disk µ-law cache shared across restarts (LRU by file mtime)
+    CACHE_DIR = Path(os.environ.get("ARIA_VOICE_CACHE", "~/.cache/aria/voice")).expanduser()
+    DISK_CACHE_MAX_BYTES = 100 * 1024 * 1024
+    # Bumped whenever alert cache keys change meaning, so old entries are never read
+    DISK_CACHE_VERSION = 2
+
     # Throttling configuration
     THROTTLE_WINDOW_SECONDS = 5.0
+    THROTTLE_MAX_ENTRIES = 256
     MAX_QUEUE_SIZE = 20
 
+    # Queued alerts older than this are dropped instead of spoken
+    MAX_ALERT_AGE_SECONDS = {
+        AlertPriority.CRITICAL: float("inf"),
+        AlertPriority.WARNING: 8.0,
+        AlertPriority.NAVIGATION: 5.0,
+        AlertPriority.INFO: 2.0,
+    }
+
+    # Queued alerts synthesized concurrently ahead of playback
+    SYNTHESIS_WORKERS = 3
+
     # Voice characteristics for surgical context
     VOICE_SETTINGS = {
         "stability": 0.75,      # Stable, clear pronunciation
@@ -96,12 +182,23 @@ class VoiceService:
         self.voice_id = voice_id
         self.enable_fallback = enable_fallback
 
-        # ElevenLabs client
-        self.elevenlabs_client = None
+        # ElevenLabs HTTP client: one keep-alive (HTTP/2 when available) pool
+        # shared by all synthesis workers, so bursts of alerts reuse connections
+        self.elevenlabs_client: Optional["httpx.Client"] = None
         api_key = elevenlabs_api_key or os.environ.get("ELEVENLABS_API_KEY")
         if ELEVENLABS_AVAILABLE and api_key:
             try:
-                self.elevenlabs_client = ElevenLabs(api_key=api_key)
+                self.elevenlabs_client = httpx.Client(
+                    base_url=self.ELEVENLABS_API_URL,
+                    headers={"xi-api-key": api_key},
+                    http2=HTTP2_AVAILABLE,
+                    timeout=httpx.Timeout(self.ELEVENLABS_TIMEOUT_MS / 1000),
+                    limits=httpx.Limits(
+                        max_connections=self.SYNTHESIS_WORKERS + 1,
+                        max_keepalive_connections=self.SYNTHESIS_WORKERS + 1,
+                        keepalive_expiry=60.0,
+                    ),
+                )
                 print("[VoiceService] ElevenLabs initialized")
             except Exception as e:
                 print(f"[VoiceService] ElevenLabs init failed: {e}")
@@ -118,39 +215,118 @@ class VoiceService:
             except Exception as e:
                 print(f"[VoiceService] pyttsx3 init failed: {e}")
 
-        # Alert queue
-        self.alert_queue: PriorityQueue[VoiceAlert] = PriorityQueue(maxsize=self.MAX_QUEUE_SIZE)
+        # Alert queue: heap of (priority, seq, alert); seq keeps FIFO order within a priority
+        self._alert_heap: List[tuple] = []
+        self._alert_cv = threading.Condition()
+        self._alert_seq = itertools.count()
+        self._critical_generation = 0  # Bumped per CRITICAL; older non-critical alerts go stale
         self.is_speaking = False
         self.is_muted = False
 
         # Throttling state
-        self._recent_alerts: Dict[str, float] = {}  # alert_hash -> last_time
+        # normalized text -> last_time, oldest first; bounded and expired inline
+        self._recent_alerts: "OrderedDict[str, float]" = OrderedDict()
         self._alert_count = 0
-        self._last_cleanup = time.time()
 
-        # Worker thread
+        # Worker threads: dispatch submits synthesis, playback plays results in priority order
         self._worker_thread: Optional[threading.Thread] = None
+        self._playback_thread: Optional[threading.Thread] = None
+        self._synth_pool: Optional[ThreadPoolExecutor] = None
+        self._playback_queue: "PriorityQueue[tuple]" = PriorityQueue()
+        self._playback_seq = itertools.count()  # Tie-breaker keeps FIFO order within a priority
+        self._critical_pending = 0  # CRITICAL alerts dispatched but not yet played
+        self._critical_lock = threading.Lock()
+        self._speaking_priority: Optional[int] = None  # Priority of the queued alert being played
+
+        # pyttsx3 runs on its own loop thread so speech can be preempted
+        self._tts_thread: Optional[threading.Thread] = None
+        self._tts_requests: "SimpleQueue[tuple]" = SimpleQueue()
+        self._tts_speaking: Optional[threading.Event] = None  # Done event of the utterance being spoken
+        self._tts_preempt: Optional[threading.Event] = None  # Done event of the utterance to cut off
         self._running = False
 
-        # Audio cache for repeated alerts
+        # Audio cache for repeated alerts (µ-law bytes)
         self._audio_cache: Dict[str, bytes] = {}
-        self._cache_max_size = 50
+        self._cache_max_size = 100
+
+        # Audio for the fixed SurgicalAlerts texts, never evicted
+        self._pinned_audio: Dict[str, bytes] = {}
+
+        # Disk cache directory for this voice/model/format
+        self._disk_cache_dir = self._disk_cache_dir_for(voice_id)
+        self._disk_cache_bytes: Optional[int] = None  # Running size; None until scanned
+        self._disk_cache_lock = threading.Lock()  # Guards _disk_cache_bytes and sweeps
+
+        # Persistent PCM output stream (opened in start())
+        self._audio_stream = None
+        # Decoded int16 chunks drained by the PortAudio callback; only the
+        # callback pops from the left, producers only append
+        self._pcm_buffer: "deque[np.ndarray]" = deque()
+        self._pcm_offset = 0  # Samples of _pcm_buffer[0] already played
+        self._pcm_drained = threading.Event()
+        self._playback_lock = threading.Lock()
 
     def start(self):
         """Start the voice service worker thread."""
         if self._running:
             return
 
+        self._create_disk_cache_dir()
+
+        if SOUNDDEVICE_AVAILABLE and self.elevenlabs_client:
+            try:
+                self._audio_stream = sounddevice.RawOutputStream(
+                    samplerate=self.PCM_SAMPLE_RATE,
+                    channels=1,
+                    dtype='int16',
+                    blocksize=self.OUTPUT_BLOCK_FRAMES,
+                    callback=self._audio_callback
+                )
+                self._audio_stream.start()
+            except Exception as e:
+                print(f"[VoiceService] Audio output init failed: {e}")
+                self._audio_stream = None
+
         self._running = True
+        self._synth_pool = ThreadPoolExecutor(
+            max_workers=self.SYNTHESIS_WORKERS,
+            thread_name_prefix="voice-synth"
+        )
         self._worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
         self._worker_thread.start()
+        self._playback_thread = threading.Thread(target=self._playback_loop, daemon=True)
+        self._playback_thread.start()
+        if self.tts_engine:
+            self._tts_thread = threading.Thread(target=self._tts_loop, daemon=True)
+            self._tts_thread.start()
         print("[VoiceService] Worker started")
 
+        # Open the ElevenLabs connection, then synthesize and pin the fixed
+        # surgical alerts, in the background
+        if self.elevenlabs_client:
+            threading.Thread(target=self._warm_up, daemon=True).start()
+
     def stop(self):
         """Stop the voice service."""
-        self._running = False
+        with self._alert_cv:
+            self._running = False
+            self._alert_cv.notify_all()
         if self._worker_thread:
             self._worker_thread.join(timeout=2.0)
+        if self._playback_thread:
+            self._playback_thread.join(timeout=2.0)
+        if self._tts_thread:
+            self._tts_thread.join(timeout=2.0)
+            self._tts_thread = None
+        if self._synth_pool:
+            self._synth_pool.shutdown(wait=False, cancel_futures=True)
+            self._synth_pool = None
+        if self._audio_stream is not None:
+            self._audio_stream.stop()
+            self._audio_stream.close()
+            self._audio_stream = None
+            self._pcm_buffer.clear()
+            self._pcm_offset = 0
         print("[VoiceService] Stopped")
 
     def queue_alert(
@@ -175,16 +351,13 @@ class VoiceService:
         if self.is_muted and priority != AlertPriority.CRITICAL:
             return False
 
-        # Clean old throttle entries periodically
-        current_time = time.time()
-        if current_time - self._last_cleanup > 30:
-            self._cleanup_throttle_cache()
-            self._last_cleanup = current_time
+        current_time = time.monotonic()  # Immune to wall-clock jumps
 
         # Check throttling
-        alert_hash = self._hash_alert(text)
-        if not force and alert_hash in self._recent_alerts:
-            last_time = self._recent_alerts[alert_hash]
+        precomputed = _PRECOMPUTED_ALERTS.get(text)
+        alert_key = precomputed[0] if precomputed else _normalize_alert_text(text)
+        if not force and alert_key in self._recent_alerts:
+            last_time = self._recent_alerts[alert_key]
             if current_time - last_time < self.THROTTLE_WINDOW_SECONDS:
                 return False
 
@@ -193,19 +366,24 @@ class VoiceService:
             priority=priority,
             timestamp=current_time,
             text=text,
-            alert_id=f"{self._alert_count}_{alert_hash[:8]}",
+            alert_id=f"{self._alert_count}_{hash(alert_key) & 0xFFFFFFFF:08x}",
             metadata=metadata or {}
         )
 
         # Queue alert
-        try:
-            self.alert_queue.put_nowait(alert)
-            self._recent_alerts[alert_hash] = current_time
-            self._alert_count += 1
-            return True
-        except Exception:
-            # Queue full, drop lowest priority if this is higher priority
-            return False
+        with self._alert_cv:
+            if priority == AlertPriority.CRITICAL:
+                self._critical_generation += 1
+            alert.generation = self._critical_generation
+            if len(self._alert_heap) >= self.MAX_QUEUE_SIZE:
+                self._prune_stale_alerts(current_time)
+                if len(self._alert_heap) >= self.MAX_QUEUE_SIZE:
+                    return False
+            heapq.heappush(self._alert_heap, (alert.priority, next(self._alert_seq), alert))
+            self._alert_cv.notify()
+        self._remember_alert(alert_key, current_time)
+        self._alert_count += 1
+        return True
 
     async def queue_alert_async(
         self,
@@ -215,10 +393,10 @@ class VoiceService:
         metadata: Optional[Dict] = None
     ) -> bool:
         """Async wrapper for queue_alert."""
-        return await asyncio.get_event_loop().run_in_executor(
-            None,
-            lambda: self.queue_alert(text, priority, force, metadata)
-        )
+        # queue_alert only pushes onto the alert heap under _alert_cv (held just
+        # for heap operations, never across I/O) and updates the throttle dict,
+        # so it runs inline rather than on an executor thread
+        return self.queue_alert(text, priority, force, metadata)
 
     def speak_immediate(self, text: str, use_fallback: bool = False) -> bool:
         """
@@ -249,29 +427,21 @@ class VoiceService:
             self.is_speaking = False
 
     def _speak_elevenlabs(self, text: str) -> bool:
-        """Speak using ElevenLabs API."""
+        """Speak using ElevenLabs API, falling back to pyttsx3 if synthesis fails."""
         try:
-            # Check cache first
-            text_hash = self._hash_alert(text)
-            if text_hash in self._audio_cache:
-                audio_data = self._audio_cache[text_hash]
-            else:
-                # Generate speech with timeout
-                audio_generator = self.elevenlabs_client.text_to_speech.convert(
-                    voice_id=self.voice_id,
-                    text=text,
-                    model_id=self.DEFAULT_MODEL,
-                    output_format="mp3_22050_32"
-                )
+            if self._audio_stream is None:
+                raise RuntimeError("no audio output stream")
 
-                # Collect audio data
-                audio_data = b"".join(audio_generator)
-
-                # Cache for reuse
-                if len(self._audio_cache) < self._cache_max_size:
-                    self._audio_cache[text_hash] = audio_data
-
-            # Play audio
+            # Check memory and disk cache first
+            text_hash = self._hash_alert(text)
+            audio_data = self._load_cached_audio(text_hash)
+            if audio_data is not None:
+                self._play_audio_data(audio_data)
+                return True
+
+            # Generate the whole clip before playing any of it: a stream that
+            # fails partway would otherwise leave the alert cut off mid-sentence
+            audio_data = b"".join(self._generate_audio(text, text_hash))
             self._play_audio_data(audio_data)
             return True
 
@@ -282,78 +452,417 @@ class VoiceService:
                 return self._speak_pyttsx3(text)
             return False
 
+    def _write_pcm(self, chunks):
+        """
+        Decode µ-law chunks into the output buffer as they arrive, then wait
+        until the callback has played them (caller holds _playback_lock).
+        """
+        buffer = self._pcm_buffer
+        for chunk in chunks:
+            if chunk:
+                buffer.append(_ulaw_to_linear(chunk))
+        self._wait_pcm_drained()
+
+    def _wait_pcm_drained(self):
+        """Block until the output callback has consumed everything buffered."""
+        while self._pcm_buffer and self._audio_stream is not None:
+            self._pcm_drained.wait(timeout=0.05)
+            self._pcm_drained.clear()
+
+    def _audio_callback(self, outdata, frames: int, time_info, status):
+        """
+        PortAudio callback: copy the next block of buffered samples out.
+
+        Runs on the PortAudio thread at a fixed cadence, so playback timing
+        does not depend on when the playback thread gets scheduled. Pads with
+        silence when the buffer runs dry.
+        """
+        out = np.frombuffer(outdata, dtype=np.int16)
+        buffer = self._pcm_buffer
+        pos = 0
+        while pos < frames and buffer:
+            chunk = buffer[0]
+            take = min(len(chunk) - self._pcm_offset, frames - pos)
+            out[pos:pos + take] = chunk[self._pcm_offset:self._pcm_offset + take]
+            pos += take
+            self._pcm_offset += take
+            if self._pcm_offset == len(chunk):
+                buffer.popleft()
+                self._pcm_offset = 0
+        if pos < frames:
+            out[pos:] = 0
+            self._pcm_drained.set()
+
+    def _generate_audio(self, text: str, text_hash: str, pin: bool = False):
+        """
+        Yield PCM chunks from ElevenLabs while writing them to the caches.
+
+        The disk file is written to a .tmp path and renamed into place only
+        once the full clip has arrived. With pin=True the clip goes to the
+        pinned store instead of the bounded in-memory cache.
+        """
+        final_path = self._disk_cache_dir / f"{text_hash}.pcm"
+        tmp_path = final_path.with_suffix(f".{threading.get_ident()}.tmp")
+        chunks = []
+        try:
+            with self.elevenlabs_client.stream(
+                "POST",
+                f"/text-to-speech/{self.voice_id}/stream",
+                params={"output_format": self.OUTPUT_FORMAT},
+                json={
+                    "text": text,
+                    "model_id": self.DEFAULT_MODEL,
+                    "voice_settings": self.VOICE_SETTINGS,
+                },
+            ) as response, open(tmp_path, "wb") as f:
+                response.raise_for_status()
+                for chunk in response.iter_bytes(self.STREAM_CHUNK_BYTES):
+                    f.write(chunk)
+                    chunks.append(chunk)
+                    yield chunk
+            os.replace(tmp_path, final_path)
+        except BaseException:  # Includes GeneratorExit when playback stops early
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        audio_data = b"".join(chunks)
+        if pin:
+            self._pinned_audio[text_hash] = audio_data
+        elif len(self._audio_cache) < self._cache_max_size:
+            self._audio_cache[text_hash] = audio_data
+
+        # Only rescan the directory once the running total exceeds the budget.
+        # Synthesis workers finish concurrently, so the total is updated under a lock.
+        with self._disk_cache_lock:
+            if self._disk_cache_bytes is not None:
+                self._disk_cache_bytes += len(audio_data)
+            if self._disk_cache_bytes is None or self._disk_cache_bytes > self.DISK_CACHE_MAX_BYTES:
+                self._sweep_disk_cache()
+
+    def _load_cached_audio(self, text_hash: str) -> Optional[bytes]:
+        """Return cached PCM from the pinned store, memory or disk, or None on a miss."""
+        audio_data = self._pinned_audio.get(text_hash)
+        if audio_data is None:
+            audio_data = self._audio_cache.get(text_hash)
+        if audio_data is not None:
+            return audio_data
+
+        audio_data = self._read_disk_cache(text_hash)
+        if audio_data is not None and len(self._audio_cache) < self._cache_max_size:
+            self._audio_cache[text_hash] = audio_data
+        return audio_data
+
+    def _read_disk_cache(self, text_hash: str) -> Optional[bytes]:
+        """Read a clip from the disk cache and mark it recently used."""
+        path = self._disk_cache_dir / f"{text_hash}.pcm"
+        try:
+            audio_data = path.read_bytes()
+            os.utime(path)  # Mark as recently used for LRU eviction
+        except OSError:
+            return None
+        return audio_data
+
+    def _create_disk_cache_dir(self):
+        """Create the disk cache directory for the current voice."""
+        try:
+            self._disk_cache_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            print(f"[VoiceService] Disk cache unavailable: {e}")
+
+    def _sweep_disk_cache(self):
+        """
+        Evict least recently used clips until the disk cache fits its budget
+        (caller holds _disk_cache_lock).
+        """
+        try:
+            entries = [(p.stat(), p) for p in self._disk_cache_dir.glob("*.pcm")]
+        except OSError:
+            return
+        total = sum(st.st_size for st, _ in entries)
+        if total > self.DISK_CACHE_MAX_BYTES:
+            for st, path in sorted(entries, key=lambda e: e[0].st_mtime):
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= st.st_size
+                if total <= self.DISK_CACHE_MAX_BYTES:
+                    break
+        self._disk_cache_bytes = total
+
+    def _warm_up(self):
+        """Prewarm the HTTP connection, then pin the fixed surgical alerts."""
+        self._prewarm_connection()
+        self._pin_alerts(SurgicalAlerts.fixed_texts())
+
+    def _prewarm_connection(self):
+        """
+        Open a pooled connection to ElevenLabs ahead of the first alert.
+
+        The TCP + TLS handshake would otherwise eat most of the first alert's
+        ELEVENLABS_TIMEOUT_MS budget; the connection then stays in the
+        keep-alive pool. Uses a longer timeout than synthesis since nothing
+        is waiting on it.
+        """
+        try:
+            self.elevenlabs_client.head("/voices", timeout=2.0)
+        except Exception as e:
+            print(f"[VoiceService] ElevenLabs prewarm failed: {e}")
+
+    def _pin_alerts(self, texts: List[str]):
+        """Load or synthesize (without playback) the given texts into the pinned store."""
+        for text in texts:
+            if not self._running:
+                return
+            text_hash = self._hash_alert(text)
+            if text_hash in self._pinned_audio:
+                continue
+            audio_data = self._read_disk_cache(text_hash)
+            if audio_data is not None:
+                self._pinned_audio[text_hash] = audio_data
+                continue
+            try:
+                for _ in self._generate_audio(text, text_hash, pin=True):
+                    pass
+            except Exception as e:
+                print(f"[VoiceService] Pinning audio failed for '{text}': {e}")
+
     def _speak_pyttsx3(self, text: str) -> bool:
         """Speak using pyttsx3 (offline fallback)."""
         try:
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
+            if self._tts_thread is None:
+                self.tts_engine.say(text)
+                self.tts_engine.runAndWait()
+                return True
+
+            # Hand off to the pyttsx3 loop thread; wait until spoken or preempted
+            done = threading.Event()
+            self._tts_requests.put((text, done))
+            done.wait(timeout=len(text) * 0.1 + 2.0)
             return True
         except Exception as e:
             print(f"[VoiceService] pyttsx3 error: {e}")
             return False
 
-    def _play_audio_data(self, audio_data: bytes):
-        """Play audio data (MP3 bytes)."""
+    def _tts_loop(self):
+        """
+        Drive pyttsx3 with its non-blocking loop (startLoop(False) + iterate()).
+
+        All engine calls happen on this thread. Utterances can be cut short
+        with engine.stop() when a CRITICAL alert preempts them.
+        """
+        engine = self.tts_engine
+        current: Optional[threading.Event] = None
+        current_name: Optional[str] = None
+        names = itertools.count()
+
+        def finish():
+            nonlocal current
+            self._tts_speaking = None
+            current.set()
+            current = None
+
+        def on_finished(name, completed):
+            # Ignore late notifications for utterances already stopped
+            if current is not None and name == current_name:
+                finish()
+
         try:
-            # Write to temp file and play
-            with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as f:
-                f.write(audio_data)
-                temp_path = f.name
-
-            # Use system audio player
-            import subprocess
-            import platform
-
-            if platform.system() == "Darwin":  # macOS
-                subprocess.run(["afplay", temp_path], check=True, timeout=10)
-            elif platform.system() == "Linux":
-                subprocess.run(["mpg123", "-q", temp_path], check=True, timeout=10)
-            elif platform.system() == "Windows":
-                import winsound
-                # Windows needs WAV, so this might not work directly
-                # Consider using pygame or another library
-                pass
-
-            os.unlink(temp_path)
+            engine.connect('finished-utterance', on_finished)
+            engine.startLoop(False)
+        except Exception as e:
+            print(f"[VoiceService] pyttsx3 loop unavailable, speaking synchronously: {e}")
+            self._tts_thread = None
+            return
+
+        while self._running:
+            if current is None:
+                try:
+                    text, current = self._tts_requests.get_nowait()
+                except Empty:
+                    pass
+                else:
+                    # A preemption aimed at an earlier utterance must not cut this one off
+                    self._tts_preempt = None
+                    self._tts_speaking = current
+                    current_name = f"alert-{next(names)}"
+                    engine.say(text, current_name)
+            target = self._tts_preempt
+            if target is not None:
+                self._tts_preempt = None
+                if target is current:
+                    engine.stop()
+                    finish()
+            engine.iterate()
+            time.sleep(0.02)
+
+        engine.endLoop()
+
+    def _preempt_speech(self):
+        """Ask the pyttsx3 loop to cut off the utterance speaking right now, if any."""
+        self._tts_preempt = self._tts_speaking
 
+    def _play_audio_data(self, audio_data: bytes):
+        """Play audio data (µ-law bytes) on the output stream."""
+        try:
+            with self._playback_lock:
+                self._pcm_buffer.append(_ulaw_to_linear(audio_data))
+                self._wait_pcm_drained()
         except Exception as e:
             print(f"[VoiceService] Audio playback error: {e}")
 
     def _worker_loop(self):
-        """Background worker processing alert queue."""
+        """Background worker dispatching queued alerts to the synthesis pool."""
         while self._running:
             try:
-                # Get next alert with timeout
-                try:
-                    alert = self.alert_queue.get(timeout=0.5)
-                except Exception:
-                    continue
-
-                # Check if alert is still relevant (not too old)
-                age = time.time() - alert.timestamp
-                if age > 10.0 and alert.priority > AlertPriority.CRITICAL:
-                    continue  # Skip stale non-critical alerts
-
-                # Speak alert
-                use_fallback = alert.priority == AlertPriority.CRITICAL
-                self.speak_immediate(alert.text, use_fallback=use_fallback)
+                # Sleep until an alert is queued or the service stops, then take
+                # the whole burst so its synthesis requests go out together
+                with self._alert_cv:
+                    self._alert_cv.wait_for(lambda: self._alert_heap or not self._running)
+                    if not self._running:
+                        break
+                    batch = [heapq.heappop(self._alert_heap)[2] for _ in range(len(self._alert_heap))]
+
+                now = time.monotonic()
+                for alert in batch:
+                    if self._is_stale(alert, now):
+                        continue  # Skip stale non-critical alerts
+
+                    # Synthesize concurrently; playback order is decided by the playback thread
+                    use_fallback = alert.priority == AlertPriority.CRITICAL
+                    clip = _AudioClip()
+                    self._synth_pool.submit(self._synthesize, alert.text, use_fallback, clip)
+                    if alert.priority == AlertPriority.CRITICAL:
+                        with self._critical_lock:
+                            self._critical_pending += 1
+                        # Cut off lower-priority speech already in progress
+                        if self._speaking_priority is not None and self._speaking_priority > AlertPriority.CRITICAL:
+                            self._preempt_speech()
+                    self._playback_queue.put((alert.priority, next(self._playback_seq), alert, clip))
 
             except Exception as e:
                 print(f"[VoiceService] Worker error: {e}")
 
+    def _synthesize(self, text: str, use_fallback: bool, clip: "_AudioClip"):
+        """
+        Feed an alert's PCM into its clip once synthesis completes, without playing it.
+
+        Audio is only handed over once the whole stream has arrived, so a
+        stream that fails partway never plays a truncated alert. The clip is
+        closed with None; a clip closed without audio is spoken with pyttsx3
+        instead.
+        """
+        try:
+            if use_fallback or not self.elevenlabs_client or self._audio_stream is None:
+                return
+            text_hash = self._hash_alert(text)
+            audio_data = self._load_cached_audio(text_hash)
+            if audio_data is not None:
+                clip.chunks.put(audio_data)
+                return
+            chunks = []
+            for chunk in self._generate_audio(text, text_hash):
+                if clip.cancelled:
+                    return
+                chunks.append(chunk)
+            clip.chunks.put(b"".join(chunks))
+        except Exception as e:
+            print(f"[VoiceService] ElevenLabs error: {e}")
+        finally:
+            clip.chunks.put(None)
+
+    def _playback_loop(self):
+        """Play synthesized alerts one at a time, highest priority first."""
+        while self._running:
+            try:
+                item = self._playback_queue.get(timeout=0.5)
+            except Empty:
+                continue
+
+            priority, _, alert, clip = item
+            try:
+                first_chunk = self._await_first_chunk(priority, clip)
+            except _Preempted:
+                # A CRITICAL alert is waiting; let it go first
+                self._playback_queue.put(item)
+                continue
+
+            if priority == AlertPriority.CRITICAL:
+                with self._critical_lock:
+                    self._critical_pending -= 1
+
+            self._speaking_priority = priority
+            try:
+                self._play_clip(alert.text, first_chunk, clip)
+            finally:
+                self._speaking_priority = None
+
+    def _await_first_chunk(self, priority: int, clip: "_AudioClip") -> Optional[bytes]:
+        """Wait for a clip's first chunk, yielding to CRITICAL alerts while waiting."""
+        while not clip.has_head:
+            if priority > AlertPriority.CRITICAL and self._critical_pending:
+                raise _Preempted()
+            try:
+                clip.head = clip.chunks.get(timeout=0.05)
+                clip.has_head = True
+            except Empty:
+                continue
+        return clip.head
+
+    def _play_clip(self, text: str, first_chunk: Optional[bytes], clip: "_AudioClip"):
+        """Stream a clip to the output as its chunks arrive, or speak with pyttsx3 if it has none."""
+        if self.is_muted:
+            clip.cancelled = True
+            return
+        self.is_speaking = True
+        try:
+            if first_chunk is not None:
+                with self._playback_lock:
+                    self._write_pcm(itertools.chain([first_chunk], iter(clip.chunks.get, None)))
+            elif self.tts_engine:
+                self._speak_pyttsx3(text)
+            else:
+                print(f"[VoiceService] No TTS available. Alert: {text}")
+        except Exception as e:
+            print(f"[VoiceService] Audio playback error: {e}")
+        finally:
+            self.is_speaking = False
+
+    def _disk_cache_dir_for(self, voice_id: str) -> Path:
+        """Disk cache directory for a voice, namespaced by cache version, model and format."""
+        return self.CACHE_DIR / f"v{self.DISK_CACHE_VERSION}_{voice_id}_{self.DEFAULT_MODEL}_{self.OUTPUT_FORMAT}"
+
     def _hash_alert(self, text: str) -> str:
-        """Generate hash for alert text (for throttling)."""
-        return hashlib.md5(text.lower().encode()).hexdigest()
-
-    def _cleanup_throttle_cache(self):
-        """Remove old entries from throttle cache."""
-        current_time = time.time()
-        expired = [
-            k for k, v in self._recent_alerts.items()
-            if current_time - v > self.THROTTLE_WINDOW_SECONDS * 2
-        ]
-        for k in expired:
-            del self._recent_alerts[k]
+        """SHA-256 of the normalized alert text (audio cache key, stable across processes)."""
+        precomputed = _PRECOMPUTED_ALERTS.get(text)
+        if precomputed:
+            return precomputed[1]
+        return _precompute_alert(text)[1]
+
+    def _is_stale(self, alert: VoiceAlert, now: float) -> bool:
+        """Whether a queued alert is too old, or superseded by later CRITICAL alerts, to be worth speaking."""
+        if alert.priority == AlertPriority.CRITICAL:
+            return False
+        return (
+            now - alert.timestamp > self.MAX_ALERT_AGE_SECONDS[alert.priority]
+            or alert.generation < self._critical_generation - 1
+        )
+
+    def _prune_stale_alerts(self, now: float):
+        """Drop stale alerts from the heap (caller holds _alert_cv)."""
+        fresh = [entry for entry in self._alert_heap if not self._is_stale(entry[2], now)]
+        if len(fresh) != len(self._alert_heap):
+            heapq.heapify(fresh)
+            self._alert_heap[:] = fresh
+
+    def _remember_alert(self, alert_key: str, current_time: float):
+        """Record an alert for throttling and drop expired or excess entries from the old end."""
+        recent = self._recent_alerts
+        recent[alert_key] = current_time
+        recent.move_to_end(alert_key)
+        expiry = current_time - self.THROTTLE_WINDOW_SECONDS * 2
+        while recent and (len(recent) > self.THROTTLE_MAX_ENTRIES or next(iter(recent.values())) < expiry):
+            recent.popitem(last=False)
 
     def mute(self):
         """Mute voice alerts (except critical)."""
@@ -369,14 +878,25 @@ class VoiceService:
         """Change ElevenLabs voice."""
         self.voice_id = voice_id
         self._audio_cache.clear()
+        self._pinned_audio.clear()
+        self._disk_cache_dir = self._disk_cache_dir_for(voice_id)
+        with self._disk_cache_lock:
+            self._disk_cache_bytes = None
+        self._create_disk_cache_dir()
 
     def clear_queue(self):
         """Clear all pending alerts."""
-        while not self.alert_queue.empty():
+        with self._alert_cv:
+            self._alert_heap.clear()
+        while True:
             try:
-                self.alert_queue.get_nowait()
-            except Exception:
+                priority, _, _, clip = self._playback_queue.get_nowait()
+            except Empty:
                 break
+            clip.cancelled = True
+            if priority == AlertPriority.CRITICAL:
+                with self._critical_lock:
+                    self._critical_pending -= 1
 
     def get_status(self) -> Dict[str, Any]:
         """Get voice service status."""
@@ -385,9 +905,10 @@ class VoiceService:
             "pyttsx3_available": self.tts_engine is not None,
             "is_muted": self.is_muted,
             "is_speaking": self.is_speaking,
-            "queue_size": self.alert_queue.qsize(),
+            "queue_size": len(self._alert_heap) + self._playback_queue.qsize(),
             "total_alerts": self._alert_count,
             "cache_size": len(self._audio_cache),
+            "pinned_alerts": len(self._pinned_audio),
             "voice_id": self.voice_id
         }
 
@@ -418,6 +939,25 @@ class SurgicalAlerts:
     INFO_SAFETY_SCORE = "Safety score: {score}"
     INFO_RESECTION_PROGRESS = "Resection progress: {percent} percent."
 
+    @classmethod
+    def fixed_texts(cls) -> List[str]:
+        """All alert texts without format placeholders."""
+        return [
+            value for name, value in vars(cls).items()
+            if name.isupper() and isinstance(value, str) and "{" not in value
+        ]
+
+
+def _precompute_alert(text: str) -> tuple:
+    key = _normalize_alert_text(text)
+    return key, hashlib.sha256(key.encode()).hexdigest()
+
+
+# (throttle key, audio cache hash) for the fixed alert texts, computed once at import
+_PRECOMPUTED_ALERTS: Dict[str, tuple] = {
+    text: _precompute_alert(text) for text in SurgicalAlerts.fixed_texts()
+}
+
 
 # Singleton instance
 _voice_instance: Optional[VoiceService] = None
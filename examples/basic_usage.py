@@ -127,30 +127,82 @@ async def example_streaming_analysis():
     print("\nNote: This would normally use a webcam.")
     print("For this demo, we'll simulate the streaming behavior.\n")
     
-    # Simulate what streaming would look like
+    # Simulate what streaming would look like: a camera reader thread, segmentation
+    # on this task, and a writer thread for output, joined by bounded queues so
+    # capture overlaps with compute
+    import queue
+    import threading
+    import time
     import numpy as np
     
     segmenter = NeuroimagingSegmenter(modality="OR_CAMERA")
+    num_frames = 5
+    camera_fps = 30
+    read_q = queue.Queue(maxsize=2)   # Prefetched frames
+    write_q = queue.Queue(maxsize=2)  # Results waiting to be displayed
     
-    for frame_id in range(5):
-        # Simulate frame generation
-        frame = np.random.randint(80, 180, (480, 640, 3), dtype=np.uint8)
-        
-        # Add simulated structures
-        frame[200:260, 200:260] = (220, 200, 200)  # Tumor
-        frame[150:170, 300:310] = (40, 40, 80)      # Blood
+    def reader():
+        for frame_id in range(num_frames):
+            # Simulate frame generation
+            frame = np.random.randint(80, 180, (480, 640, 3), dtype=np.uint8)
+            
+            # Add simulated structures
+            frame[200:260, 200:260] = (220, 200, 200)  # Tumor
+            frame[150:170, 300:310] = (40, 40, 80)      # Blood
+            
+            read_q.put((frame_id, frame))
+            time.sleep(1 / camera_fps)  # Camera frame interval
+        read_q.put(None)  # End of stream
+    
+    def writer():
+        while True:
+            item = write_q.get()
+            if item is None:
+                break
+            frame_id, result = item
+            
+            # Display results
+            structures = [
+                name for name, stats in result.stats.items() 
+                if stats["region_count"] > 0
+            ]
+            
+            print(f"Frame {frame_id + 1}: {result.processing_time_ms:.1f}ms | "
+                  f"Structures: {structures}")
+    
+    def drain_to_latest(item):
+        """Skip frames that queued up while busy, so we always segment the newest."""
+        while item is not None:
+            try:
+                newer = read_q.get_nowait()
+            except queue.Empty:
+                break
+            if newer is None:
+                read_q.put(None)  # Keep the end marker for the next read
+                break
+            item = newer
+        return item
+    
+    threads = [
+        threading.Thread(target=reader, daemon=True),
+        threading.Thread(target=writer, daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    
+    while True:
+        item = drain_to_latest(await asyncio.to_thread(read_q.get))
+        if item is None:
+            break
+        frame_id, frame = item
         
         # Segment
         result = segmenter.segment_and_analyze(frame)
-        
-        # Display results
-        structures = [
-            name for name, stats in result.stats.items() 
-            if stats["region_count"] > 0
-        ]
-        
-        print(f"Frame {frame_id + 1}: {result.processing_time_ms:.1f}ms | "
-              f"Structures: {structures}")
+        write_q.put((frame_id, result))
+    
+    write_q.put(None)
+    for thread in threads:
+        thread.join()
     
     print("\n[Streaming complete]")
 
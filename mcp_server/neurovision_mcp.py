@@ -21,7 +21,9 @@
 """
 
 import os
+import re
 import sys
+import json
 import base64
 import asyncio
 from pathlib import Path
@@ -50,6 +52,25 @@ except ImportError:
     ANTHROPIC_AVAILABLE = False
     print("Warning: anthropic package not installed. Claude Vision disabled.")
 
+# Optional accelerators for image upload encoding (fall back to OpenCV / stdlib)
+try:
+    import simplejpeg
+    SIMPLEJPEG_AVAILABLE = True
+except ImportError:
+    SIMPLEJPEG_AVAILABLE = False
+
+try:
+    import pybase64
+    PYBASE64_AVAILABLE = True
+except ImportError:
+    PYBASE64_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 
 # =============================================================================
 # MCP SERVER INITIALIZATION
@@ -62,6 +83,7 @@ mcp = FastMCP("NeuroVision")
 # =============================================================================
 
 CHARACTER_LIMIT = 25000
+JPEG_QUALITY = 95  # OpenCV's imencode default
 SUPPORTED_IMAGE_FORMATS = [".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".dcm"]
 
 class AnalysisMode(str, Enum):
@@ -98,36 +120,85 @@ def load_image(image_path: str) -> Optional[np.ndarray]:
 
 def image_to_base64(image: np.ndarray) -> str:
     """Convert OpenCV image to base64 string."""
-    _, buffer = cv2.imencode('.jpg', image)
-    return base64.b64encode(buffer).decode('utf-8')
+    if SIMPLEJPEG_AVAILABLE and image.ndim == 3 and image.shape[2] == 3:
+        # libjpeg-turbo directly on the BGR buffer, 4:2:0 like OpenCV
+        buffer = simplejpeg.encode_jpeg(
+            np.ascontiguousarray(image),
+            quality=JPEG_QUALITY,
+            colorspace='BGR',
+            colorsubsampling='420',
+            fastdct=True
+        )
+    else:
+        _, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+
+    # Encode straight from the buffer without a bytes() copy
+    if PYBASE64_AVAILABLE:
+        return pybase64.b64encode_as_string(memoryview(buffer).cast('B'))
+    return base64.b64encode(memoryview(buffer).cast('B')).decode('utf-8')
 
 
 def format_response(data: Dict[str, Any], format_type: str = "markdown") -> str:
     """Format response as markdown or JSON."""
     if format_type == "json":
-        import json
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(
+                data,
+                default=str,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            ).decode("utf-8")
         return json.dumps(data, indent=2, default=str)
 
     # Markdown format
     lines = []
+    append = lines.append
     for key, value in data.items():
+        title = key.replace('_', ' ').title()
         if isinstance(value, list):
-            lines.append(f"### {key.replace('_', ' ').title()}")
+            append(f"### {title}")
             for item in value:
                 if isinstance(item, dict):
-                    lines.append(f"- **{item.get('label', 'Item')}**: {item.get('description', str(item))}")
+                    append(f"- **{item.get('label', 'Item')}**: {item.get('description', str(item))}")
                 else:
-                    lines.append(f"- {item}")
+                    append(f"- {item}")
         elif isinstance(value, dict):
-            lines.append(f"### {key.replace('_', ' ').title()}")
+            append(f"### {title}")
             for k, v in value.items():
-                lines.append(f"- **{k}**: {v}")
+                append(f"- **{k}**: {v}")
         else:
-            lines.append(f"**{key.replace('_', ' ').title()}**: {value}")
+            append(f"**{title}**: {value}")
 
     return "\n".join(lines)
 
 
+# JSON object inside a ```json (or bare ```) code fence
+_JSON_FENCE_RE = re.compile(r'```(?:json)?\s*(\{.*?\})\s*```', re.DOTALL)
+
+
+def extract_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract the JSON object from a model response.
+
+    Prefers a fenced ```json block, then falls back to the outermost {...} span.
+    Returns None if neither parses.
+    """
+    candidates = []
+    match = _JSON_FENCE_RE.search(text)
+    if match:
+        candidates.append(match.group(1))
+    start = text.find('{')
+    end = text.rfind('}') + 1
+    if start >= 0 and end > start:
+        candidates.append(text[start:end])
+
+    for candidate in candidates:
+        try:
+            return orjson.loads(candidate) if ORJSON_AVAILABLE else json.loads(candidate)
+        except ValueError:  # orjson.JSONDecodeError and json.JSONDecodeError
+            continue
+    return None
+
+
 # =============================================================================
 # LOCAL SEGMENTATION (No API needed - runs at 36+ FPS)
 # =============================================================================
@@ -144,50 +215,94 @@ class NeuroimagingSegmenter:
         "ventricles": (255, 0, 255), # Magenta
     }
 
+    # Inclusive intensity bands of the blurred image, one class bit each
+    INTENSITY_BANDS = {
+        "tumor": (201, 255),       # High intensity (potential tumor/enhancement)
+        "csf": (0, 50),            # Dark regions (CSF/ventricles)
+        "parenchyma": (80, 180),   # Mid-range
+    }
+
+    # Morphology kernels, built once
+    _K3 = np.ones((3, 3), np.uint8)
+    _K5 = np.ones((5, 5), np.uint8)
+
     def __init__(self, modality: str = "MRI"):
         self.modality = modality.upper()
 
+        # Intensity -> class bitfield LUT, and per-structure bitfield -> 0/255 mask LUTs
+        self._class_lut = np.zeros(256, np.uint8)
+        self._mask_luts = {}
+        values = np.arange(256)
+        for i, (structure, (low, high)) in enumerate(self.INTENSITY_BANDS.items()):
+            bit = 1 << i
+            self._class_lut[low:high + 1] |= bit
+            self._mask_luts[structure] = np.where(values & bit, 255, 0).astype(np.uint8)
+
+        # Overlay tint tables by (structures, alpha)
+        self._tint_tables = {}
+
+        # Per-frame scratch images, allocated once per frame size and reused
+        self._buffer_shape = None
+        self._gray = self._blurred = self._classes = None
+
+    def _ensure_buffers(self, shape: tuple):
+        if shape != self._buffer_shape:
+            self._buffer_shape = shape
+            self._gray = np.empty(shape, np.uint8)
+            self._blurred = np.empty(shape, np.uint8)
+            self._classes = np.empty(shape, np.uint8)
+
     def segment_all(self, image: np.ndarray) -> Dict[str, np.ndarray]:
         """Segment all structures in the image."""
         masks = {}
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-
-        # Threshold-based segmentation for different structures
-        # High intensity regions (potential tumor/enhancement)
-        _, masks["tumor"] = cv2.threshold(blurred, 200, 255, cv2.THRESH_BINARY)
-
-        # Dark regions (CSF/ventricles)
-        _, masks["csf"] = cv2.threshold(blurred, 50, 255, cv2.THRESH_BINARY_INV)
+        self._ensure_buffers(image.shape[:2])
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0, dst=self._blurred)
 
-        # Mid-range (parenchyma)
-        masks["parenchyma"] = cv2.inRange(blurred, 80, 180)
+        # Threshold-based segmentation: classify every pixel in one LUT pass,
+        # then expand each structure's bit into its mask
+        classes = cv2.LUT(blurred, self._class_lut, dst=self._classes)
+        for structure, mask_lut in self._mask_luts.items():
+            masks[structure] = cv2.LUT(classes, mask_lut)
 
         # Edge detection for vessels
         edges = cv2.Canny(blurred, 50, 150)
-        masks["vessels"] = cv2.dilate(edges, np.ones((3, 3), np.uint8), iterations=1)
+        masks["vessels"] = cv2.dilate(edges, self._K3, dst=edges, iterations=1)
 
-        # Clean up masks with morphological operations
-        kernel = np.ones((5, 5), np.uint8)
-        for key in masks:
-            masks[key] = cv2.morphologyEx(masks[key], cv2.MORPH_CLOSE, kernel)
-            masks[key] = cv2.morphologyEx(masks[key], cv2.MORPH_OPEN, kernel)
+        # Clean up masks with morphological operations (in place)
+        for mask in masks.values():
+            cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self._K5, dst=mask)
+            cv2.morphologyEx(mask, cv2.MORPH_OPEN, self._K5, dst=mask)
 
         return masks
 
     def create_overlay(self, image: np.ndarray, masks: Dict[str, np.ndarray],
                        alpha: float = 0.4) -> np.ndarray:
         """Create colored overlay visualization."""
-        overlay = image.copy()
-
-        for structure, mask in masks.items():
-            if structure in self.STRUCTURE_COLORS:
-                color = self.STRUCTURE_COLORS[structure]
-                colored_mask = np.zeros_like(image)
-                colored_mask[mask > 0] = color
-                overlay = cv2.addWeighted(overlay, 1, colored_mask, alpha, 0)
-
-        return overlay
+        structures = tuple(s for s in masks if s in self.STRUCTURE_COLORS)
+
+        # Per-pixel code with bit i set where structure i is present, so the
+        # tints of overlapping structures come from one table gather
+        codes = np.zeros(image.shape[:2], np.uint8)
+        for i, structure in enumerate(structures):
+            _, bit = cv2.threshold(masks[structure], 0, 1 << i, cv2.THRESH_BINARY)
+            cv2.bitwise_or(codes, bit, dst=codes)
+
+        # Tints add up with saturation, as blending each mask in turn would
+        return cv2.add(image, self._tint_table(structures, alpha)[codes])
+
+    def _tint_table(self, structures: tuple, alpha: float) -> np.ndarray:
+        """Summed alpha-scaled color of every combination of the given structures."""
+        key = (structures, alpha)
+        table = self._tint_tables.get(key)
+        if table is None:
+            tints = np.rint(alpha * np.array(
+                [self.STRUCTURE_COLORS[s] for s in structures], np.float64).reshape(-1, 3))
+            codes = np.arange(1 << len(structures))
+            present = (codes[:, None] >> np.arange(len(structures))) & 1
+            table = np.minimum(present @ tints, 255).astype(np.uint8)
+            self._tint_tables[key] = table
+        return table
 
     def get_statistics(self, masks: Dict[str, np.ndarray],
                        image_shape: tuple) -> Dict[str, Dict]:
@@ -196,20 +311,32 @@ class NeuroimagingSegmenter:
         stats = {}
 
         for structure, mask in masks.items():
-            pixel_count = np.sum(mask > 0)
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL,
-                                           cv2.CHAIN_APPROX_SIMPLE)
+            pixel_count = cv2.countNonZero(mask)
+            # An empty mask has no regions; skip tracing it
+            if pixel_count:
+                contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL,
+                                               cv2.CHAIN_APPROX_SIMPLE)
+                region_count = len(contours)
+            else:
+                region_count = 0
 
             stats[structure] = {
-                "pixel_count": int(pixel_count),
+                "pixel_count": pixel_count,
                 "percentage": round(pixel_count / total_pixels * 100, 2),
-                "region_count": len(contours),
+                "region_count": region_count,
                 "detected": pixel_count > 100
             }
 
         return stats
 
 
+def local_segmentation_statistics(image: np.ndarray, modality: str = "MRI") -> Dict[str, Dict]:
+    """Segment an image locally and return per-structure statistics."""
+    segmenter = NeuroimagingSegmenter(modality=modality)
+    masks = segmenter.segment_all(image)
+    return segmenter.get_statistics(masks, image.shape[:2])
+
+
 # =============================================================================
 # CLAUDE VISION ANALYZER
 # =============================================================================
@@ -265,7 +392,8 @@ Respond in JSON format with all findings organized by category."""
         if ANTHROPIC_AVAILABLE:
             api_key = os.environ.get("ANTHROPIC_API_KEY")
             if api_key:
-                self.client = anthropic.Anthropic(api_key=api_key)
+                # Async client so the API round trip doesn't block the MCP event loop
+                self.client = anthropic.AsyncAnthropic(api_key=api_key)
 
     async def analyze(self, image: np.ndarray, mode: str = "full") -> Dict[str, Any]:
         """Analyze image using Claude Vision API."""
@@ -276,10 +404,10 @@ Respond in JSON format with all findings organized by category."""
             }
 
         prompt = self.ANALYSIS_PROMPTS.get(mode, self.ANALYSIS_PROMPTS["full"])
-        image_b64 = image_to_base64(image)
+        image_b64 = await asyncio.to_thread(image_to_base64, image)
 
         try:
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model="claude-sonnet-4-20250514",
                 max_tokens=4096,
                 messages=[{
@@ -305,16 +433,8 @@ Respond in JSON format with all findings organized by category."""
             response_text = response.content[0].text
 
             # Try to extract JSON from response
-            import json
-            try:
-                # Find JSON in response
-                start = response_text.find('{')
-                end = response_text.rfind('}') + 1
-                if start >= 0 and end > start:
-                    result = json.loads(response_text[start:end])
-                else:
-                    result = {"raw_analysis": response_text}
-            except json.JSONDecodeError:
+            result = extract_json(response_text)
+            if result is None:
                 result = {"raw_analysis": response_text}
 
             result["analysis_mode"] = mode
@@ -499,15 +619,18 @@ async def detect_structures(
         image = load_image(image_path)
         result = {}
 
-        # Local segmentation (fast)
-        if include_local_segmentation:
-            segmenter = NeuroimagingSegmenter()
-            masks = segmenter.segment_all(image)
-            result["local_segmentation"] = segmenter.get_statistics(masks, image.shape[:2])
-
         # Claude Vision analysis (comprehensive)
         analyzer = ClaudeVisionAnalyzer()
-        vision_result = await analyzer.analyze(image, "navigation")
+        vision_analysis = analyzer.analyze(image, "navigation")
+
+        # Local segmentation (fast) runs on a worker thread while the API call is in flight
+        if include_local_segmentation:
+            result["local_segmentation"], vision_result = await asyncio.gather(
+                asyncio.to_thread(local_segmentation_statistics, image),
+                vision_analysis
+            )
+        else:
+            vision_result = await vision_analysis
         result["vision_analysis"] = vision_result
 
         return format_response(result, response_format)
@@ -273,17 +273,39 @@ class NeuroimagingSegmenter:
     def __init__(self, modality: str = "OR_CAMERA"):
         self.modality = modality
         self.thresholds = self.THRESHOLDS.get(modality, self.THRESHOLDS["OR_CAMERA"])
+        
+        # Per-thread gray/blur images, allocated once per frame size and reused
+        # by segment_all; per thread so concurrent callers never share them
+        self._scratch = threading.local()
     
-    def preprocess(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
-        """Preprocess frame for segmentation."""
+    def _scratch_buffers(self, shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """This thread's gray/blur scratch images for the given frame size."""
+        scratch = self._scratch
+        if getattr(scratch, "shape", None) != shape:
+            scratch.shape = shape
+            scratch.gray = np.empty(shape, np.uint8)
+            scratch.blurred = np.empty(shape, np.uint8)
+        return scratch.gray, scratch.blurred
+    
+    def _preprocess_into(
+        self,
+        frame: np.ndarray,
+        gray_dst: Optional[np.ndarray] = None,
+        blurred_dst: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Grayscale and blur the frame, writing into the given images if any."""
         if len(frame.shape) == 3:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray_dst)
         else:
             gray = frame
         
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0, dst=blurred_dst)
         return gray, blurred
     
+    def preprocess(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Preprocess frame for segmentation."""
+        return self._preprocess_into(frame)
+    
     def create_roi_mask(self, blurred: np.ndarray, threshold: int = 15) -> np.ndarray:
         """Create ROI mask to exclude background."""
         _, roi = cv2.threshold(blurred, threshold, 255, cv2.THRESH_BINARY)
@@ -328,7 +350,7 @@ class NeuroimagingSegmenter:
     
     def segment_all(self, frame: np.ndarray) -> Dict[str, np.ndarray]:
         """Segment all structures in the frame."""
-        gray, blurred = self.preprocess(frame)
+        gray, blurred = self._preprocess_into(frame, *self._scratch_buffers(frame.shape[:2]))
         roi_mask = self.create_roi_mask(blurred)
         
         masks = {}
@@ -389,6 +411,30 @@ class NeuroimagingSegmenter:
                 results[structure] = structure_data
         
         return results
+    
+    def calculate_proximity(
+        self,
+        masks: Dict[str, np.ndarray],
+        structure_a: str,
+        structure_b: str
+    ) -> Optional[float]:
+        """
+        Closest edge-to-edge distance in pixels between two structures.
+        
+        Returns None if either structure is missing or empty.
+        """
+        mask_a = masks.get(structure_a)
+        mask_b = masks.get(structure_b)
+        if mask_a is None or mask_b is None:
+            return None
+        if not cv2.countNonZero(mask_a) or not cv2.countNonZero(mask_b):
+            return None
+        
+        # One exact Euclidean distance transform to structure A, read at B's pixels
+        outside_a = cv2.compare(mask_a, 0, cv2.CMP_EQ)
+        distances = cv2.distanceTransform(outside_a, cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
+        min_distance, _, _, _ = cv2.minMaxLoc(distances, mask=mask_b)
+        return float(min_distance)
 
 
 # =============================================================================
@@ -400,6 +446,10 @@ class ClaudeVisionAnalyzer:
     Uses Claude's Vision API for intelligent surgical scene analysis.
     """
     
+    # Upload encoding (local segmentation always uses the full-resolution frame)
+    MAX_UPLOAD_WIDTH = 1024
+    UPLOAD_JPEG_QUALITY = 85
+    
     def __init__(self, api_key: Optional[str] = None):
         if not ANTHROPIC_AVAILABLE:
             raise RuntimeError("anthropic package required. Install with: pip install anthropic")
@@ -581,8 +631,18 @@ Analyze as an expert neurosurgical AI assistant."""
         }
     
     def frame_to_base64(self, frame: np.ndarray) -> str:
-        """Convert OpenCV frame to base64 for API."""
-        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        """
+        Convert OpenCV frame to base64 JPEG for API.
+        
+        Frames wider than MAX_UPLOAD_WIDTH are downscaled first; Claude
+        resizes large images anyway and bounding boxes come back as
+        percentages, so only bytes on the wire change.
+        """
+        height, width = frame.shape[:2]
+        if width > self.MAX_UPLOAD_WIDTH:
+            new_height = max(1, round(height * self.MAX_UPLOAD_WIDTH / width))
+            frame = cv2.resize(frame, (self.MAX_UPLOAD_WIDTH, new_height), interpolation=cv2.INTER_AREA)
+        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.UPLOAD_JPEG_QUALITY])
         return base64.b64encode(buffer).decode('utf-8')
     
     async def analyze_frame(
@@ -611,40 +671,8 @@ Analyze as an expert neurosurgical AI assistant."""
         prompt += "\n\nRespond ONLY with valid JSON, no other text."
         
         try:
-            message = self.client.messages.create(
-                model=self.model,
-                max_tokens=2048,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": "image/jpeg",
-                                    "data": base64_image
-                                }
-                            },
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
-                    }
-                ]
-            )
-            
-            response_text = message.content[0].text
-            
-            # Parse JSON from response
-            # Handle potential markdown code blocks
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
-            
-            return json.loads(response_text.strip())
+            response_text = await asyncio.to_thread(self._request, [base64_image], prompt)
+            return json.loads(self._strip_code_fence(response_text))
             
         except json.JSONDecodeError as e:
             return {
@@ -658,6 +686,106 @@ Analyze as an expert neurosurgical AI assistant."""
                 "type": type(e).__name__
             }
     
+    async def analyze_frames_batch(
+        self,
+        frames: List[np.ndarray],
+        mode: AnalysisMode = AnalysisMode.FULL,
+        additional_context: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Analyze several frames with a single multi-image API call.
+        
+        Args:
+            frames: OpenCV BGR frames, in order
+            mode: Analysis mode applied to every frame
+            additional_context: Extra context to include in prompt
+            
+        Returns:
+            One parsed analysis dict per frame, in the same order. On failure
+            every entry is the same error dict.
+        """
+        if len(frames) == 1:
+            return [await self.analyze_frame(frames[0], mode, additional_context)]
+        
+        base64_images = [self.frame_to_base64(frame) for frame in frames]
+        
+        prompt = self.prompts.get(mode, self.prompts[AnalysisMode.FULL])
+        if additional_context:
+            prompt += f"\n\nAdditional context: {additional_context}"
+        
+        prompt += (
+            f"\n\nYou are given {len(frames)} images, in order. Analyze each one "
+            f"independently and respond ONLY with a JSON array of exactly {len(frames)} "
+            "objects, one per image in the same order, each following the format above."
+        )
+        
+        try:
+            response_text = await asyncio.to_thread(
+                self._request, base64_images, prompt, 2048 * len(frames)
+            )
+            results = json.loads(self._strip_code_fence(response_text))
+            if not isinstance(results, list) or len(results) != len(frames):
+                raise json.JSONDecodeError("expected one JSON object per image", response_text, 0)
+            return results
+            
+        except json.JSONDecodeError as e:
+            error = {
+                "error": "Failed to parse response",
+                "raw_response": response_text if 'response_text' in locals() else None,
+                "parse_error": str(e)
+            }
+        except Exception as e:
+            error = {
+                "error": str(e),
+                "type": type(e).__name__
+            }
+        return [dict(error) for _ in frames]
+    
+    def _request(self, base64_images: List[str], prompt: str, max_tokens: int = 2048) -> str:
+        """
+        Send images plus prompt to Claude and return the response text.
+        
+        Blocks for the whole API round trip; async callers run it on a worker
+        thread so the event loop keeps serving other frames meanwhile.
+        """
+        content = [
+            {
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": "image/jpeg",
+                    "data": base64_image
+                }
+            }
+            for base64_image in base64_images
+        ]
+        content.append({
+            "type": "text",
+            "text": prompt
+        })
+        
+        message = self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            messages=[
+                {
+                    "role": "user",
+                    "content": content
+                }
+            ]
+        )
+        
+        return message.content[0].text
+    
+    @staticmethod
+    def _strip_code_fence(response_text: str) -> str:
+        """Extract the JSON payload, handling potential markdown code blocks."""
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0]
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0]
+        return response_text.strip()
+    
     def analyze_frame_sync(
         self,
         frame: np.ndarray,